@@ -0,0 +1,139 @@
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from app.services.artifacts import ARTIFACTS_DIR, SHA256_SIDECAR
+from app.services.metrics import METRICS
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DIGEST = re.compile(r"[0-9a-f]{64}")
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+async def metrics(request: Request) -> PlainTextResponse:
+    if not METRICS.enabled:
+        return PlainTextResponse("Metrics are disabled.\n", status_code=404)
+    return PlainTextResponse(
+        METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _etag(directory: Path, digest: str) -> str:
+    sidecar = directory / SHA256_SIDECAR
+    try:
+        return f'"{sidecar.read_text().strip()}"'
+    except OSError:
+        return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive bounds; raise ValueError if unsatisfiable."""
+    match = RANGE.fullmatch(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+async def _stream(file: BinaryIO, start: int, length: int):
+    try:
+        position = start
+        remaining = length
+        while remaining:
+            chunk = await asyncio.to_thread(
+                os.pread, file.fileno(), min(DOWNLOAD_CHUNK_SIZE, remaining), position
+            )
+            if not chunk:
+                break
+            position += len(chunk)
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+async def download(request: Request) -> Response:
+    """Serve a generated archive with ETag validation and single-range requests.
+
+    The file is opened before the response starts. Archives are never
+    rewritten in place, so the open handle keeps serving the same bytes
+    even if the artifact is evicted or rebuilt mid-transfer.
+    """
+    digest = request.path_params["digest"]
+    filename = request.path_params["filename"]
+    if not DIGEST.fullmatch(digest) or filename.startswith("."):
+        return PlainTextResponse("Not found.\n", status_code=404)
+    directory = ARTIFACTS_DIR / digest
+    try:
+        file = await asyncio.to_thread(open, directory / filename, "rb")
+    except OSError:
+        METRICS.inc("downloads_total", status="404")
+        return PlainTextResponse("Not found.\n", status_code=404)
+    size = os.fstat(file.fileno()).st_size
+    etag = await asyncio.to_thread(_etag, directory, digest)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        file.close()
+        METRICS.inc("downloads_total", status="304")
+        return Response(status_code=304, headers=headers)
+    start, end = 0, size - 1
+    status = 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _byte_range(range_header, size)
+        except ValueError:
+            file.close()
+            METRICS.inc("downloads_total", status="416")
+            return Response(
+                status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    length = end - start + 1 if size else 0
+    headers["Content-Length"] = str(length)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    METRICS.inc("downloads_total", status=str(status))
+    return StreamingResponse(
+        _stream(file, start, length),
+        status_code=status,
+        headers=headers,
+        media_type="application/zip",
+    )
+
+
+api = Starlette(
+    routes=[
+        Route("/metrics", metrics),
+        Route("/downloads/{digest}/{filename}", download, methods=["GET"]),
+    ]
+)
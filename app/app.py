@@ -1,9 +1,10 @@
 import reflex as rx
+from app.api import api
 from app.components.chat import chat_interface
 from app.components.summary import summary_panel
 from app.components.instructions import instructions_panel
 from app.components.api_key_modal import api_key_modal
-from app.states.chat_state import ChatState
+from app.services.llm import warm_up_sdks
 
 
 def index() -> rx.Component:
@@ -15,7 +16,7 @@ def index() -> rx.Component:
                     "ExtensionGenius AI",
                     class_name="text-2xl font-bold text-gray-900 p-6 border-b border-gray-200",
                 ),
-                chat_interface(key=ChatState.chat_history.length().to_string()),
+                chat_interface(),
                 class_name="flex flex-col h-screen",
             ),
             rx.el.div(
@@ -31,6 +32,7 @@ def index() -> rx.Component:
 
 app = rx.App(
     theme=rx.theme(appearance="light"),
+    api_transformer=api,
     head_components=[
         rx.el.link(rel="preconnect", href="https://fonts.googleapis.com"),
         rx.el.link(rel="preconnect", href="https://fonts.gstatic.com", crossorigin=""),
@@ -40,4 +42,5 @@ app = rx.App(
         ),
     ],
 )
-app.add_page(index)
\ No newline at end of file
+app.add_page(index)
+app.register_lifespan_task(warm_up_sdks)
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Build extension archives for many requirement records without the UI.
+
+Usage::
+
+    python -m app.batch requirements.jsonl --output results.jsonl --out-dir dist
+
+Each input line is a ``Requirements`` object, or an object carrying one
+under ``"requirements"`` plus an optional ``"id"``. Lines are read lazily
+and at most ``--max-in-flight`` builds are pending at once, so memory stays
+flat however large the input is. Builds run on a process pool, one per CPU
+core by default, and each finished build is appended to the results JSONL
+with its archive paths, SHA-256 hashes and timings. Every result line
+carries the record's ``"id"``. If a worker dies, the builds it took down
+are reported as errors and the remaining records continue on a fresh pool.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import IO, Iterator
+
+from app.services.artifacts import ArtifactStore
+from app.services.packaging import package_extension
+
+REQUIRED_FIELDS = ("name", "description")
+DEFAULTS = {
+    "target_browser": [],
+    "inject_urls": [],
+    "has_background_script": False,
+    "has_popup": False,
+    "has_options_page": False,
+}
+
+_store: ArtifactStore | None = None
+
+
+def _init_worker(out_dir: str):
+    global _store
+    # Batch output is kept until the caller deletes it.
+    _store = ArtifactStore(Path(out_dir), max_bytes=sys.maxsize, max_age=float("inf"))
+
+
+def _build(line: int, record_id: str, requirements: dict) -> dict:
+    start = time.perf_counter()
+    artifacts = package_extension(requirements, _store)
+    return {
+        "line": line,
+        "id": record_id,
+        "status": "ok",
+        "artifacts": {
+            target: {"path": str(artifact.path), "sha256": artifact.sha256, "size": artifact.size}
+            for target, artifact in artifacts.items()
+        },
+        "build_seconds": round(time.perf_counter() - start, 6),
+    }
+
+
+def parse_record(text: str) -> tuple[str, dict]:
+    """Return ``(id, requirements)`` for one input line; raise ValueError if unusable."""
+    record = json.loads(text)
+    if not isinstance(record, dict):
+        raise ValueError("Each line must be a JSON object.")
+    requirements = record.get("requirements", record)
+    if not isinstance(requirements, dict):
+        raise ValueError('"requirements" must be an object.')
+    missing = [f for f in REQUIRED_FIELDS if not requirements.get(f)]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    return str(record.get("id", "")), {**DEFAULTS, **requirements}
+
+
+def line_id(text: str) -> str:
+    """Best-effort ``"id"`` of a line, for error results of records that did not parse."""
+    try:
+        record = json.loads(text)
+    except ValueError:
+        return ""
+    return str(record.get("id", "")) if isinstance(record, dict) else ""
+
+
+def read_records(lines: IO[str]) -> Iterator[tuple[int, str]]:
+    for number, text in enumerate(lines, start=1):
+        if text.strip():
+            yield number, text
+
+
+def run(
+    lines: IO[str],
+    results: IO[str],
+    out_dir: Path,
+    workers: int | None = None,
+    max_in_flight: int | None = None,
+) -> dict[str, int]:
+    """Build every record in ``lines`` and write one result line per record."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {"ok": 0, "error": 0}
+    pending: dict[Future, tuple[int, str, float]] = {}
+
+    def write(result: dict):
+        counts[result["status"]] += 1
+        results.write(json.dumps(result) + "\n")
+
+    def drain(limit: int):
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                line, record_id, submitted = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"line": line, "id": record_id, "status": "error", "error": str(e)}
+                result["total_seconds"] = round(time.perf_counter() - submitted, 6)
+                write(result)
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(out_dir),))
+
+    pool = new_pool()
+    try:
+        for number, text in read_records(lines):
+            try:
+                record_id, requirements = parse_record(text)
+            except ValueError as e:
+                write({"line": number, "id": line_id(text), "status": "error", "error": str(e)})
+                continue
+            submitted = time.perf_counter()
+            try:
+                future = pool.submit(_build, number, record_id, requirements)
+            except BrokenProcessPool:
+                # Builds already on the dead pool fail on their own; this one
+                # never started, so it moves to a fresh pool.
+                pool.shutdown()
+                pool = new_pool()
+                future = pool.submit(_build, number, record_id, requirements)
+            pending[future] = (number, record_id, submitted)
+            drain(max_in_flight - 1)
+        drain(0)
+    finally:
+        pool.shutdown()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build extension archives from a JSONL file.")
+    parser.add_argument("input", type=Path, help="JSONL of Requirements records ('-' for stdin).")
+    parser.add_argument("--output", type=Path, default=Path("results.jsonl"))
+    parser.add_argument("--out-dir", type=Path, default=Path("dist"))
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to the CPU count.")
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    source = sys.stdin if str(args.input) == "-" else args.input.open()
+    with source as lines, args.output.open("w") as results:
+        counts = run(lines, results, args.out_dir, args.workers, args.max_in_flight)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Built {counts['ok']} records ({counts['error']} errors) in {elapsed:.2f}s; "
+        f"results in {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -24,11 +24,10 @@ def model_selector() -> rx.Component:
     )
 
 
-def chat_message(message: dict) -> rx.Component:
-    is_user = message.get("role") == "user"
+def message_bubble(content, is_user, key=None) -> rx.Component:
     return rx.el.div(
         rx.el.div(
-            rx.el.p(message.get("content", ""), class_name="text-base"),
+            rx.el.p(content, class_name="text-base"),
             class_name=rx.cond(
                 is_user,
                 "bg-orange-500 text-white rounded-t-2xl rounded-bl-2xl p-3",
@@ -38,16 +37,47 @@ def chat_message(message: dict) -> rx.Component:
         ),
         class_name=rx.cond(is_user, "flex justify-end", "flex justify-start"),
         width="100%",
+        key=key,
+        # Let the browser skip layout and paint for bubbles scrolled out of view.
+        style={"content_visibility": "auto", "contain_intrinsic_size": "auto 80px"},
     )
 
 
-def chat_interface(key: str) -> rx.Component:
+def chat_message(message: dict, index: rx.Var[int]) -> rx.Component:
+    # Keyed by position in the whole conversation so that paging older
+    # messages in or trimming the tail does not re-render the other bubbles.
+    return message_bubble(
+        message.get("content", ""),
+        message.get("role") == "user",
+        key=(ChatState.history_offset + index).to_string(),
+    )
+
+
+def chat_interface() -> rx.Component:
     return rx.el.div(
         model_selector(),
-        rx.el.div(
+        rx.auto_scroll(
+            rx.cond(
+                ChatState.history_offset > 0,
+                rx.el.button(
+                    "Load earlier messages",
+                    on_click=ChatState.load_older,
+                    class_name="self-center text-sm text-blue-600 hover:underline",
+                ),
+            ),
             rx.foreach(ChatState.chat_history, chat_message),
-            class_name="flex flex-col gap-4 p-6 overflow-y-auto h-full",
-            key=key,
+            rx.cond(
+                ChatState.streaming_reply != "",
+                message_bubble(ChatState.streaming_reply, False),
+            ),
+            class_name="flex flex-col gap-4 p-6 h-full",
+        ),
+        rx.cond(
+            ChatState.is_processing & (ChatState.llm_status_message != ""),
+            rx.el.p(
+                ChatState.llm_status_message,
+                class_name="px-4 pt-2 text-sm text-gray-500",
+            ),
         ),
         rx.el.form(
             rx.el.div(
@@ -1,6 +1,22 @@
 import reflex as rx
+from reflex.constants import Dirs
+from reflex.utils.imports import ImportVar
+from reflex.vars.base import VarData
+from reflex.vars.function import FunctionStringVar
 from app.states.chat_state import ChatState
 
+# env.PING is "<api_url>/ping", so a relative URL resolves against the backend
+# the same way Reflex's own upload URLs do.
+backend_url = FunctionStringVar.create(
+    "((path) => new URL(path, getBackendURL(env.PING)).href)",
+    _var_data=VarData(
+        imports={
+            f"$/{Dirs.STATE_PATH}": "getBackendURL",
+            "$/env.json": ImportVar(tag="env", is_default=True),
+        }
+    ),
+)
+
 
 def requirement_item(label: str, value: rx.Var | str) -> rx.Component:
     return rx.el.div(
@@ -42,7 +58,15 @@ def summary_panel() -> rx.Component:
                     ChatState.is_processing & ~ChatState.generation_complete,
                     rx.el.div(
                         rx.icon(tag="loader-circle", class_name="animate-spin mr-2"),
-                        "Generating...",
+                        rx.cond(
+                            ChatState.generation_status == "queued",
+                            "Queued (#" + ChatState.queue_position.to_string() + ")...",
+                            rx.cond(
+                                ChatState.generation_status == "writing_code",
+                                "Writing code...",
+                                "Generating...",
+                            ),
+                        ),
                         class_name="flex items-center justify-center",
                     ),
                     "Generate Extension",
@@ -54,14 +78,17 @@ def summary_panel() -> rx.Component:
             ),
             rx.cond(
                 ChatState.generation_complete,
-                rx.el.a(
-                    rx.el.button(
-                        rx.icon(tag="download", class_name="mr-2"),
-                        "Download Extension (.zip)",
-                        class_name="w-full h-[44px] mt-4 bg-green-500 text-white rounded-lg hover:bg-green-600 active:bg-green-700 flex items-center justify-center font-semibold text-base",
+                rx.foreach(
+                    ChatState.downloads,
+                    lambda download: rx.el.a(
+                        rx.el.button(
+                            rx.icon(tag="download", class_name="mr-2"),
+                            "Download for " + download["browser"] + " (.zip)",
+                            class_name="w-full h-[44px] mt-4 bg-green-500 text-white rounded-lg hover:bg-green-600 active:bg-green-700 flex items-center justify-center font-semibold text-base",
+                        ),
+                        href=backend_url.call(download["url"]),
+                        download=True,
                     ),
-                    href=rx.get_upload_url(ChatState.zip_path),
-                    download=True,
                 ),
             ),
             class_name="w-full",
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+SHA256_SIDECAR = ".sha256"
+# Same directory as ``rx.get_upload_dir() / "artifacts"``, resolved without
+# importing Reflex so the download route can share it.
+ARTIFACTS_DIR = (
+    Path(os.environ.get("REFLEX_UPLOADED_FILES_DIR", "uploaded_files")) / "artifacts"
+)
+
+
+def content_digest(manifest: dict, files: dict[str, bytes]) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode())
+    for name in sorted(files):
+        if name == "manifest.json":
+            continue
+        digest.update(f"\0{name}\0{len(files[name])}\0".encode())
+        digest.update(files[name])
+    return digest.hexdigest()
+
+
+@dataclass
+class Artifact:
+    digest: str
+    path: Path
+    relative_path: str
+    size: int
+    sha256: str
+
+
+class ArtifactStore:
+    """Immutable, content-addressed store for generated archives.
+
+    Archives live at ``<root>/<digest>/<filename>`` and are never rewritten.
+    A session passed to ``get``/``put`` references the artifact it was given,
+    replacing its previous reference;
+    unreferenced artifacts are evicted least-recently-used first once the
+    store exceeds ``max_bytes``, or once unused for ``max_age`` seconds.
+    References also lapse after ``max_age`` so abandoned sessions cannot
+    pin artifacts forever.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age: float = 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._artifacts: dict[str, Artifact] | None = None
+        self._last_used: dict[str, float] = {}
+        self._sessions: dict[str, tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _index(self) -> dict[str, Artifact]:
+        if self._artifacts is None:
+            self._artifacts = {}
+            self.root.mkdir(parents=True, exist_ok=True)
+            for entry in self.root.iterdir():
+                files = [
+                    f
+                    for f in (entry.iterdir() if entry.is_dir() else [])
+                    if f.is_file() and not f.name.startswith(".")
+                ]
+                if len(files) == 1:
+                    artifact = self._artifact(entry.name, files[0])
+                    self._artifacts[entry.name] = artifact
+                    self._last_used[entry.name] = files[0].stat().st_mtime
+        return self._artifacts
+
+    def _artifact(self, digest: str, path: Path, sha256: str = "") -> Artifact:
+        if not sha256:
+            sidecar = path.parent / SHA256_SIDECAR
+            if sidecar.exists():
+                sha256 = sidecar.read_text().strip()
+            else:
+                sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+        return Artifact(
+            digest=digest,
+            path=path,
+            relative_path=path.relative_to(self.root.parent).as_posix(),
+            size=path.stat().st_size,
+            sha256=sha256,
+        )
+
+    def get(self, digest: str, session: str = "") -> Artifact | None:
+        with self._lock:
+            artifact = self._index().get(digest)
+            if artifact is None or not artifact.path.exists():
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(digest, session)
+            return artifact
+
+    def put(
+        self, digest: str, filename: str, data: bytes, sha256: str, session: str = ""
+    ) -> Artifact:
+        with self._lock:
+            artifact = self._index().get(digest)
+            if artifact is not None and artifact.path.exists():
+                self._touch(digest, session)
+                return artifact
+        # Unindexed directories are never evicted, so concurrent puts of
+        # different digests can write without holding the lock.
+        directory = self.root / digest
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        (directory / SHA256_SIDECAR).write_text(sha256)
+        path = directory / filename
+        os.replace(tmp, path)
+        with self._lock:
+            artifact = self._artifact(digest, path, sha256)
+            self._artifacts[digest] = artifact
+            self._touch(digest, session)
+            self._evict()
+            return artifact
+
+    def _touch(self, digest: str, session: str):
+        now = self._clock()
+        self._last_used[digest] = now
+        if session:
+            self._sessions[session] = (digest, now)
+
+    def release(self, session: str):
+        with self._lock:
+            self._sessions.pop(session, None)
+
+    def _evict(self):
+        now = self._clock()
+        for session, (_, assigned_at) in list(self._sessions.items()):
+            if now - assigned_at > self.max_age:
+                del self._sessions[session]
+        referenced = {digest for digest, _ in self._sessions.values()}
+        total = sum(a.size for a in self._artifacts.values())
+        for digest in sorted(self._artifacts, key=lambda d: self._last_used.get(d, 0)):
+            if digest in referenced:
+                continue
+            if total <= self.max_bytes and now - self._last_used.get(digest, 0) <= self.max_age:
+                continue
+            artifact = self._artifacts.pop(digest)
+            self._last_used.pop(digest, None)
+            shutil.rmtree(artifact.path.parent, ignore_errors=True)
+            total -= artifact.size
+            self.evicted += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            artifacts = self._artifacts or {}
+            return {
+                "artifacts": len(artifacts),
+                "bytes": sum(a.size for a in artifacts.values()),
+                "sessions": len(self._sessions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+
+from app.services.llm import CLIENT_POOL, ClientPool
+from app.services.metrics import METRICS
+from app.services.packaging import ASSETS, enabled_assets
+from app.services.response_cache import ResponseCache
+from app.services.scheduler import LLM_SCHEDULER, LLMScheduler
+from app.services.structured import repair_json
+
+CODEGEN_TIMEOUT = float(os.environ.get("CODEGEN_TIMEOUT", 60))
+SYSTEM_INSTRUCTION = """You write the source files of browser extensions.
+Reply with a JSON object that maps each requested file name to its complete contents.
+Use only standard WebExtension APIs that the manifest grants. Do not use remote code.
+HTML files must load their scripts and styles from the files they are generated with."""
+CODE_BLOCK = re.compile(r"```[\w+-]*\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def normalize_description(description: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so near-identical descriptions share snippets."""
+    return " ".join(re.sub(r"[^\w\s]", " ", description.lower()).split())
+
+
+def snippet_key(kind: str, description: str, model: str) -> str:
+    payload = json.dumps([kind, normalize_description(description), model])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def asset_schema(kind: str) -> dict:
+    files = ASSETS[kind][1]
+    return {
+        "type": "OBJECT",
+        "properties": {name: {"type": "STRING"} for name in files},
+        "required": list(files),
+    }
+
+
+def asset_prompt(kind: str, requirements: dict, manifest: dict) -> str:
+    files = ", ".join(ASSETS[kind][1])
+    return (
+        f"Write {files} for the {kind} part of this extension.\n\n"
+        f"Description: {requirements['description']}\n\n"
+        f"manifest.json:\n{json.dumps(manifest, indent=2)}"
+    )
+
+
+def parse_files(text: str, kind: str) -> dict[str, str]:
+    """Pull the requested files out of a reply; a bare code block counts for single-file assets."""
+    files = ASSETS[kind][1]
+    try:
+        reply = repair_json(text)
+    except ValueError:
+        reply = {}
+    snippets = {name: reply[name] for name in files if isinstance(reply.get(name), str)}
+    if not snippets and len(files) == 1:
+        fenced = CODE_BLOCK.search(text)
+        code = (fenced.group(1) if fenced else text).strip()
+        if code:
+            snippets = {files[0]: code}
+    if not snippets:
+        raise ValueError(f"No {kind} source in the model reply.")
+    return snippets
+
+
+class AssetGenerator:
+    """Generate each enabled script asset with the LLM, all assets concurrently.
+
+    Snippets are cached by (asset kind, normalised description, model), so
+    extensions described the same way reuse them. An asset that cannot be
+    generated keeps its placeholder files.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache,
+        pool: ClientPool = CLIENT_POOL,
+        scheduler: LLMScheduler = LLM_SCHEDULER,
+        timeout: float = CODEGEN_TIMEOUT,
+    ):
+        self.cache = cache
+        self.pool = pool
+        self.scheduler = scheduler
+        self.timeout = timeout
+
+    async def _call(self, api_key: str, model: str, session: str, kind: str, prompt: str) -> str:
+        async def call() -> str:
+            async with self.pool.client(api_key, model) as client:
+                return await client.send_message(
+                    [], prompt, SYSTEM_INSTRUCTION, asset_schema(kind)
+                )
+
+        async for update in self.scheduler.submit(api_key, session, call):
+            if update.status == "done":
+                return update.result
+
+    async def generate_asset(
+        self,
+        api_key: str,
+        model: str,
+        session: str,
+        kind: str,
+        requirements: dict,
+        manifest: dict,
+    ) -> dict[str, str]:
+        key = snippet_key(kind, requirements["description"], model)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            METRICS.inc("codegen_total", asset=kind, outcome="hit")
+            return json.loads(cached)
+        prompt = asset_prompt(kind, requirements, manifest)
+        text = await asyncio.wait_for(
+            self._call(api_key, model, session, kind, prompt), self.timeout
+        )
+        snippets = parse_files(text, kind)
+        await asyncio.to_thread(self.cache.put, key, json.dumps(snippets))
+        METRICS.inc("codegen_total", asset=kind, outcome="generated")
+        return snippets
+
+    async def cached(self, model: str, requirements: dict, manifest: dict) -> dict[str, str] | None:
+        """Return the cached sources for every enabled asset, or None if any is missing."""
+        assets = {}
+        for kind in enabled_assets(manifest):
+            key = snippet_key(kind, requirements["description"], model)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is None:
+                return None
+            assets.update(json.loads(cached))
+        return assets
+
+    async def generate(
+        self,
+        api_key: str,
+        model: str,
+        session: str,
+        requirements: dict,
+        manifest: dict,
+    ) -> tuple[dict[str, str], list[str]]:
+        """Return generated sources by file name, and the asset kinds that failed."""
+        kinds = enabled_assets(manifest)
+        with METRICS.span("generate_extension", "codegen"):
+            results = await asyncio.gather(
+                *(
+                    self.generate_asset(api_key, model, session, kind, requirements, manifest)
+                    for kind in kinds
+                ),
+                return_exceptions=True,
+            )
+        assets = {}
+        failed = []
+        for kind, result in zip(kinds, results):
+            if isinstance(result, BaseException):
+                logging.warning(f"Generating the {kind} asset failed: {result!r}")
+                METRICS.inc("codegen_total", asset=kind, outcome="failed")
+                failed.append(kind)
+                continue
+            assets.update(result)
+        return assets, failed
+
+
+SNIPPET_CACHE = ResponseCache(
+    os.environ.get("SNIPPET_CACHE_PATH", ".cache/snippets.sqlite3"),
+    max_bytes=int(os.environ.get("SNIPPET_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+)
+ASSET_GENERATOR = AssetGenerator(SNIPPET_CACHE)
+METRICS.register_gauges("snippet_cache", SNIPPET_CACHE.stats)
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+
+SUMMARY_LINE_CHARS = 160
+SUMMARY_HEADER = "\n\nSummary of the earlier conversation:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _message_tokens(messages: list[dict]) -> int:
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+def _to_content(message: dict) -> dict:
+    role = "model" if message["role"] == "assistant" else message["role"]
+    return {"role": role, "parts": [{"text": message["content"]}]}
+
+
+def fold_summary(summary: str, messages: list[dict], max_tokens: int) -> str:
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        if len(text) > SUMMARY_LINE_CHARS:
+            text = text[: SUMMARY_LINE_CHARS - 3] + "..."
+        lines.append(f"{message['role'].capitalize()}: {text}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+@dataclass
+class PromptWindow:
+    system_instruction: str
+    history: list[dict]
+    message: str
+    summary: str
+    summarized_count: int
+    prompt_tokens: int
+    full_prompt_tokens: int
+
+
+class ConversationWindow:
+    """Fit a chat transcript into a token budget.
+
+    The last ``keep_turns`` exchanges are sent verbatim (fewer if they do not
+    fit); anything older is folded into a rolling plain-text summary that is
+    appended to the system instruction. Folding is incremental: callers keep
+    ``summary`` and ``summarized_count`` and pass them back on the next turn.
+    """
+
+    def __init__(
+        self, token_budget: int = 4000, keep_turns: int = 6, summary_tokens: int = 400
+    ):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+
+    def build(
+        self,
+        system_prompt: str,
+        messages: list[dict],
+        summary: str = "",
+        summarized_count: int = 0,
+    ) -> PromptWindow:
+        *earlier, last = messages
+        summarized_count = min(summarized_count, len(earlier))
+        tail_start = max(summarized_count, len(earlier) - 2 * self.keep_turns)
+        budget = (
+            self.token_budget
+            - estimate_tokens(system_prompt)
+            - estimate_tokens(last["content"])
+            - estimate_tokens(SUMMARY_HEADER)
+            - self.summary_tokens
+        )
+        while tail_start < len(earlier) and _message_tokens(earlier[tail_start:]) > budget:
+            tail_start += 1
+        if tail_start > summarized_count:
+            summary = fold_summary(
+                summary, earlier[summarized_count:tail_start], self.summary_tokens
+            )
+            summarized_count = tail_start
+        system_instruction = system_prompt
+        if summary:
+            system_instruction += SUMMARY_HEADER + summary
+        tail = earlier[tail_start:]
+        return PromptWindow(
+            system_instruction=system_instruction,
+            history=[_to_content(m) for m in tail],
+            message=last["content"],
+            summary=summary,
+            summarized_count=summarized_count,
+            prompt_tokens=estimate_tokens(system_instruction)
+            + _message_tokens(tail)
+            + estimate_tokens(last["content"]),
+            full_prompt_tokens=estimate_tokens(system_prompt)
+            + _message_tokens(earlier)
+            + estimate_tokens(last["content"]),
+        )
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import random
+from typing import AsyncIterator
+
+FAKE_REQUIREMENTS = {
+    "name": "Fake Extension",
+    "description": "An extension described to the fake model.",
+    "target_browser": ["Chrome"],
+    "inject_urls": ["*://*.example.com/*"],
+    "has_background_script": True,
+    "has_popup": True,
+    "has_options_page": False,
+}
+
+
+def fake_snippet(file_name: str, prompt: str) -> str:
+    """A small, valid placeholder for ``file_name`` that records what was asked."""
+    summary = prompt.splitlines()[0] if prompt else ""
+    stem, _, extension = file_name.rpartition(".")
+    if extension == "html":
+        return (
+            f"<!doctype html><html><head><link rel='stylesheet' href='{stem}.css'></head>"
+            f"<body><!-- {summary} --><script src='{stem}.js'></script></body></html>"
+        )
+    if extension == "css":
+        return f"/* {summary} */"
+    return f"// {summary}\nconsole.log({json.dumps(file_name + ' loaded')});"
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like ``google.genai.errors.APIError`` for a 429 response."""
+
+    def __init__(self, retry_after: float | None = None, code: int = 429):
+        super().__init__(f"{code} RESOURCE_EXHAUSTED")
+        self.code = code
+        self.retry_after = retry_after
+
+
+class FakeLLMClient:
+    """Offline stand-in for ``GeminiClient`` with configurable latency and jitter.
+
+    The first ``rate_limited_calls`` requests fail with ``FakeRateLimitError``.
+    """
+
+    def __init__(
+        self,
+        api_key: str = "",
+        model: str = "fake-model",
+        latency: float = 0.5,
+        jitter: float = 0.1,
+        chunk_size: int = 24,
+        requirements: dict | None = None,
+        seed: int | None = None,
+        rate_limited_calls: int = 0,
+        retry_after: float | None = None,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_size = chunk_size
+        self.requirements = requirements or FAKE_REQUIREMENTS
+        self.rate_limited_calls = rate_limited_calls
+        self.retry_after = retry_after
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _count_call(self):
+        self.calls += 1
+        if self.calls <= self.rate_limited_calls:
+            raise FakeRateLimitError(self.retry_after)
+
+    def reply_for(self, message: str, response_schema: dict | None = None) -> str:
+        properties = (response_schema or {}).get("properties", {})
+        if properties and "response" not in properties:
+            # Code generation: one snippet per requested file.
+            return json.dumps({name: fake_snippet(name, message) for name in properties})
+        return json.dumps(
+            {
+                "response": f"Thanks! Noted: {message[:60]}. Anything else?",
+                "requirements": self.requirements,
+            }
+        )
+
+    async def send_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> str:
+        self._count_call()
+        await asyncio.sleep(self._delay())
+        return self.reply_for(message, response_schema)
+
+    async def stream_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> AsyncIterator[str]:
+        self._count_call()
+        reply = self.reply_for(message, response_schema)
+        chunks = [reply[i : i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+        delay = self._delay()
+        await asyncio.sleep(delay / 2)
+        for chunk in chunks:
+            await asyncio.sleep(delay / 2 / len(chunks))
+            yield chunk
+
+    async def list_models(self) -> list[str]:
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        return [self.model]
+
+    async def aclose(self):
+        pass
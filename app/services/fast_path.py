@@ -0,0 +1,167 @@
+import re
+from dataclasses import dataclass
+
+FIELD_ORDER = [
+    "name",
+    "description",
+    "target_browser",
+    "inject_urls",
+    "has_background_script",
+    "has_popup",
+    "has_options_page",
+]
+
+QUESTIONS = {
+    "name": "What would you like your extension to be called?",
+    "description": "What should the extension do?",
+    "target_browser": "Which browsers should it support: Chrome, Firefox, or both?",
+    "inject_urls": "Which pages should it run on? You can give URL match patterns like *://*.example.com/*, or say none.",
+    "has_background_script": "Does it need a background script?",
+    "has_popup": "Should it have a popup when you click the toolbar icon?",
+    "has_options_page": "Does it need an options page?",
+}
+
+DONE_MESSAGE = "That's everything I need! Click \"Generate Extension\" when you're ready."
+
+FIELD_KEYWORDS = {
+    "name": ("name", "called"),
+    "description": ("describe", "description", "what should", "what will", "purpose"),
+    "target_browser": ("browser",),
+    "inject_urls": ("url", "website", "site", "pages", "match pattern"),
+    "has_background_script": ("background",),
+    "has_popup": ("popup", "pop-up", "toolbar"),
+    "has_options_page": ("options", "settings page"),
+}
+
+FILLER_WORDS = {
+    "a", "an", "and", "both", "for", "i", "it", "just", "needs", "need", "one",
+    "only", "please", "should", "the", "thanks", "want", "we", "would", "like",
+    "to", "support", "on", "run", "in", "with", "of", "course", "definitely",
+}
+YES_WORDS = {"yes", "yeah", "yep", "yup", "sure", "y", "ok", "okay", "absolutely", "correct"}
+NO_WORDS = {"no", "nope", "nah", "n", "none", "skip", "without", "not", "don't", "dont"}
+BROWSER_WORDS = {"chrome": "Chrome", "chromium": "Chrome", "firefox": "Firefox"}
+ALL_BROWSER_WORDS = {"all", "every", "either"}
+FIELD_WORDS = {
+    "target_browser": {"browser", "browsers", "google", "mozilla"},
+    "inject_urls": {"url", "urls", "pages", "page", "sites", "site", "websites", "anywhere"},
+    "has_background_script": {"background", "script", "worker", "service"},
+    "has_popup": {"popup", "pop-up", "pop", "up", "toolbar"},
+    "has_options_page": {"options", "option", "settings", "page"},
+}
+
+URL_PATTERN = re.compile(
+    r"<all_urls>|(?:\*|https?|wss?|ftp|file|urn):///?[^\s,;]+", re.IGNORECASE
+)
+WORD = re.compile(r"[a-z][a-z'-]*")
+
+
+@dataclass
+class FastPathResult:
+    requirements: dict
+    reply: str
+    next_field: str
+    confidence: float
+
+
+def infer_pending_field(assistant_message: str) -> str:
+    """Guess which requirement the assistant's last question asked about."""
+    question = assistant_message.lower()
+    if "?" in question:
+        question = question[: question.rfind("?")]
+        question = re.split(r"[.!?]\s", question)[-1]
+    matches = [
+        field
+        for field, keywords in FIELD_KEYWORDS.items()
+        if any(keyword in question for keyword in keywords)
+    ]
+    return matches[0] if len(matches) == 1 else ""
+
+
+def next_field(requirements: dict, answered: str) -> str:
+    for field in ("name", "description"):
+        if not requirements.get(field):
+            return field
+    for field in FIELD_ORDER[FIELD_ORDER.index(answered) + 1 :]:
+        if field in ("name", "description"):
+            continue
+        if isinstance(requirements.get(field), list) and requirements[field]:
+            continue
+        return field
+    return ""
+
+
+def _leftover_words(text: str, known: set[str]) -> list[str]:
+    return [w for w in WORD.findall(text.lower()) if w not in known and w not in FILLER_WORDS]
+
+
+def _extract_browsers(message: str) -> tuple[list[str], float]:
+    words = WORD.findall(message.lower())
+    if any(w in ALL_BROWSER_WORDS for w in words):
+        browsers = ["Chrome", "Firefox"]
+    else:
+        browsers = sorted({BROWSER_WORDS[w] for w in words if w in BROWSER_WORDS})
+    if not browsers:
+        return [], 0.0
+    known = set(BROWSER_WORDS) | ALL_BROWSER_WORDS | FIELD_WORDS["target_browser"]
+    return browsers, 1.0 if not _leftover_words(message, known) else 0.3
+
+
+def _extract_urls(message: str) -> tuple[list[str], float]:
+    patterns = URL_PATTERN.findall(message)
+    remainder = URL_PATTERN.sub(" ", message)
+    if not patterns:
+        words = set(WORD.findall(message.lower()))
+        if words and words <= NO_WORDS | FILLER_WORDS | FIELD_WORDS["inject_urls"]:
+            return [], 1.0
+        return [], 0.0
+    known = FIELD_WORDS["inject_urls"]
+    return patterns, 1.0 if not _leftover_words(remainder, known) else 0.3
+
+
+def _extract_yes_no(message: str, field: str) -> tuple[bool | None, float]:
+    words = set(WORD.findall(message.lower()))
+    yes, no = bool(words & YES_WORDS), bool(words & NO_WORDS)
+    if yes == no:
+        return None, 0.0
+    known = YES_WORDS | NO_WORDS | FIELD_WORDS[field]
+    return yes, 1.0 if not _leftover_words(message, known) else 0.3
+
+
+def extract_answer(
+    message: str, requirements: dict, pending_field: str
+) -> FastPathResult | None:
+    """Answer a trivial turn locally, or return None to defer to the model."""
+    updates = {}
+    confidence = 0.0
+    field = pending_field
+    if field == "target_browser":
+        browsers, confidence = _extract_browsers(message)
+        updates[field] = browsers
+    elif field == "inject_urls":
+        patterns, confidence = _extract_urls(message)
+        updates[field] = patterns
+    elif field in ("has_background_script", "has_popup", "has_options_page"):
+        answer, confidence = _extract_yes_no(message, field)
+        updates[field] = answer
+    elif field in ("name", "description"):
+        # Free text is the model's job; storing a browser or URL here would
+        # leave the question that was asked unanswered.
+        return None
+    else:
+        patterns, _ = _extract_urls(message)
+        browsers, _ = _extract_browsers(message)
+        if bool(patterns) == bool(browsers):
+            return None
+        field = "inject_urls" if patterns else "target_browser"
+        return extract_answer(message, requirements, field)
+    if confidence == 0.0:
+        return None
+    updated = {**requirements, **updates}
+    following = next_field(updated, field)
+    return FastPathResult(
+        requirements=updated,
+        reply=f"Got it. {QUESTIONS[following]}" if following else DONE_MESSAGE,
+        next_field=following,
+        confidence=confidence,
+    )
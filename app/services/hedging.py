@@ -0,0 +1,267 @@
+import asyncio
+import collections
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from app.services.llm import CLIENT_POOL, ClientPool
+from app.services.metrics import METRICS
+from app.services.streaming import ResponseStreamParser
+from app.services.structured import parse_reply
+
+
+class LatencyTracker:
+    """Rolling latencies of successful LLM calls per provider-qualified model.
+
+    ``threshold`` is the ``quantile`` of the last ``window`` samples, or
+    ``default`` until ``min_samples`` have been seen. Samples are also
+    observed as the ``metric`` histogram.
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        quantile: float = 0.95,
+        default: float = 5.0,
+        metric: str = "llm_latency_seconds",
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.default = default
+        self.metric = metric
+        self._samples: dict[str, collections.deque[float]] = {}
+
+    def record(self, model: str, seconds: float):
+        samples = self._samples.setdefault(model, collections.deque(maxlen=self.window))
+        samples.append(seconds)
+        METRICS.observe(self.metric, seconds, model=model)
+
+    def threshold(self, model: str) -> float:
+        samples = self._samples.get(model, ())
+        if len(samples) < self.min_samples:
+            return self.default
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+
+    def stats(self) -> dict[str, float]:
+        return {f"{model}_p95": self.threshold(model) for model in self._samples}
+
+
+class HedgedRouter:
+    """Send a request to the primary model, hedging to fallbacks when it is slow.
+
+    If the primary has not produced a reply that ``parse`` accepts within
+    its tracked p95 latency (or fails outright), the next fallback is asked
+    too. The first parseable reply wins and the other requests are
+    cancelled. Streamed requests hedge on the p95 time to the first
+    ``response`` text instead, tracked in ``first_text``. The whole
+    exchange is bounded by ``timeout``. Parsing is timed as the
+    ``json_parse`` phase of ``metrics_path``.
+    """
+
+    def __init__(
+        self,
+        pool: ClientPool = CLIENT_POOL,
+        fallbacks: list[str] | None = None,
+        tracker: LatencyTracker | None = None,
+        timeout: float = 60.0,
+        parse: Callable[[str], Any] = parse_reply,
+        first_text: LatencyTracker | None = None,
+        metrics_path: str = "process_message",
+    ):
+        self.pool = pool
+        self.fallbacks = fallbacks or []
+        self.tracker = tracker or LatencyTracker()
+        self.first_text = first_text or LatencyTracker(
+            default=2.0, metric="llm_first_text_seconds"
+        )
+        self.timeout = timeout
+        self.parse = parse
+        self.metrics_path = metrics_path
+
+    def _parse(self, text: str) -> Any:
+        with METRICS.span(self.metrics_path, "json_parse"):
+            return self.parse(text)
+
+    async def _attempt(
+        self,
+        api_key: str,
+        model: str,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None,
+        response_schema: dict | None,
+    ) -> tuple[str, Any]:
+        start = time.perf_counter()
+        async with self.pool.client(api_key, model) as client:
+            text = await client.send_message(
+                history, message, system_instruction, response_schema
+            )
+        result = self._parse(text)
+        self.tracker.record(model, time.perf_counter() - start)
+        return model, result
+
+    async def send_message(
+        self,
+        api_key: str,
+        model: str,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> Any:
+        """Return ``parse`` of the first valid reply from ``model`` or a fallback."""
+        return await asyncio.wait_for(
+            self._send_race(api_key, model, history, message, system_instruction, response_schema),
+            self.timeout,
+        )
+
+    async def _send_race(
+        self,
+        api_key: str,
+        model: str,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None,
+        response_schema: dict | None,
+    ) -> Any:
+        candidates = [model, *(m for m in self.fallbacks if m != model)]
+        pending: set[asyncio.Task] = set()
+        errors: list[BaseException] = []
+        try:
+            while candidates or pending:
+                hedge_after = None
+                if candidates:
+                    candidate = candidates.pop(0)
+                    if candidate != model:
+                        METRICS.inc("llm_hedges_total", model=candidate)
+                    pending.add(
+                        asyncio.create_task(
+                            self._attempt(
+                                api_key,
+                                candidate,
+                                history,
+                                message,
+                                system_instruction,
+                                response_schema,
+                            )
+                        )
+                    )
+                    if candidates:
+                        hedge_after = self.tracker.threshold(candidate)
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner, result = task.result()
+                        METRICS.inc("llm_hedge_wins_total", model=winner)
+                        return result
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        raise errors[0]
+
+    async def stream_message(
+        self,
+        api_key: str,
+        model: str,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+        on_text: Callable[[str], Awaitable[None]] | None = None,
+    ) -> Any:
+        """Stream a reply, passing the winner's ``response`` text so far to ``on_text``.
+
+        The first request to start its ``response`` text wins; a failure
+        after that is not retried on a fallback.
+        """
+        return await asyncio.wait_for(
+            self._stream_race(
+                api_key, model, history, message, system_instruction, response_schema, on_text
+            ),
+            self.timeout,
+        )
+
+    async def _stream_race(
+        self,
+        api_key: str,
+        model: str,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None,
+        response_schema: dict | None,
+        on_text: Callable[[str], Awaitable[None]] | None,
+    ) -> Any:
+        candidates = [model, *(m for m in self.fallbacks if m != model)]
+        winner: list[str] = []
+        started = asyncio.Event()
+
+        async def attempt(candidate: str) -> tuple[str, Any]:
+            start = time.perf_counter()
+            parser = ResponseStreamParser()
+            async with self.pool.client(api_key, candidate) as client:
+                async for text in client.stream_message(
+                    history, message, system_instruction, response_schema
+                ):
+                    if not parser.feed(text):
+                        continue
+                    if not winner:
+                        winner.append(candidate)
+                        self.first_text.record(candidate, time.perf_counter() - start)
+                        started.set()
+                    if on_text is not None and winner[0] == candidate:
+                        await on_text(parser.response_text)
+            if not winner:
+                raise ValueError("AI response did not contain a reply message.")
+            result = self._parse(parser.text)
+            self.tracker.record(candidate, time.perf_counter() - start)
+            return candidate, result
+
+        tasks: dict[asyncio.Task, str] = {}
+        errors: list[BaseException] = []
+        try:
+            while not started.is_set() and (candidates or any(not t.done() for t in tasks)):
+                hedge_after = None
+                if candidates:
+                    candidate = candidates.pop(0)
+                    if candidate != model:
+                        METRICS.inc("llm_hedges_total", model=candidate)
+                    tasks[asyncio.create_task(attempt(candidate))] = candidate
+                    if candidates:
+                        hedge_after = self.first_text.threshold(candidate)
+                waiter = asyncio.create_task(started.wait())
+                running = {t for t in tasks if not t.done()}
+                await asyncio.wait(
+                    running | {waiter}, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                waiter.cancel()
+                for task in running:
+                    if task.done() and task.exception() is not None and not started.is_set():
+                        errors.append(task.exception())
+            if not started.is_set():
+                raise errors[0]
+            task = next(t for t, c in tasks.items() if c == winner[0])
+            for other in tasks:
+                if other is not task:
+                    other.cancel()
+            _, result = await task
+            METRICS.inc("llm_hedge_wins_total", model=winner[0])
+            return result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+LLM_ROUTER = HedgedRouter(
+    fallbacks=[m for m in os.environ.get("LLM_FALLBACK_MODELS", "").split(",") if m],
+    timeout=float(os.environ.get("LLM_TIMEOUT", 60)),
+)
+METRICS.register_gauges("llm_latency", LLM_ROUTER.tracker.stats)
+METRICS.register_gauges("llm_first_text", LLM_ROUTER.first_text.stats)
@@ -0,0 +1,305 @@
+import asyncio
+import contextlib
+import functools
+import importlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable
+
+from app.services.fake_llm import FakeLLMClient
+from app.services.metrics import METRICS
+from app.services.model_cache import key_fingerprint
+from app.services.response_cache import CachedClient, ResponseCache
+from app.services.structured import conforms
+
+SDK_MODULES = {"gemini": "google.genai", "anthropic": "anthropic"}
+SDK_PACKAGES = {"gemini": "google-genai", "anthropic": "anthropic"}
+WARM_UP_PROVIDERS = [
+    p for p in os.environ.get("LLM_WARM_UP_PROVIDERS", "gemini").split(",") if p
+]
+
+
+@functools.cache
+def import_sdk(provider: str):
+    """Import a provider SDK on first use; these imports take hundreds of ms."""
+    try:
+        return importlib.import_module(SDK_MODULES[provider])
+    except ImportError as e:
+        raise ImportError(
+            f"{SDK_PACKAGES[provider]} not installed. Run `pip install {SDK_PACKAGES[provider]}`"
+        ) from e
+
+
+async def warm_up_sdks():
+    """Import the configured provider SDKs off the event loop after startup."""
+    for provider in WARM_UP_PROVIDERS:
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(import_sdk, provider)
+        except (ImportError, KeyError) as e:
+            logging.warning(f"Could not warm up the {provider} SDK: {e}")
+            continue
+        METRICS.observe("sdk_import_seconds", time.perf_counter() - start, provider=provider)
+
+
+class GeminiClient:
+    """A Gemini client bound to one API key and model.
+
+    Each instance owns its own ``genai.Client`` (and HTTP connections), so no
+    process-global SDK configuration is involved.
+    """
+
+    def __init__(self, api_key: str, model: str):
+        genai = import_sdk("gemini")
+        self.model = model
+        self._client = genai.Client(api_key=api_key)
+
+    def _request(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None,
+        response_schema: dict | None,
+    ) -> dict:
+        config = {}
+        if system_instruction:
+            config["system_instruction"] = system_instruction
+        if response_schema:
+            config["response_mime_type"] = "application/json"
+            config["response_schema"] = response_schema
+        request = {
+            "model": self.model,
+            "contents": [*history, {"role": "user", "parts": [{"text": message}]}],
+        }
+        if config:
+            request["config"] = config
+        return request
+
+    async def send_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> str:
+        response = await self._client.aio.models.generate_content(
+            **self._request(history, message, system_instruction, response_schema)
+        )
+        return response.text or ""
+
+    async def stream_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> AsyncIterator[str]:
+        stream = await self._client.aio.models.generate_content_stream(
+            **self._request(history, message, system_instruction, response_schema)
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+    async def list_models(self) -> list[str]:
+        model_names = []
+        async for m in await self._client.aio.models.list():
+            if "generateContent" in (m.supported_actions or []):
+                model_names.append(m.name.replace("models/", ""))
+        return sorted(model_names)
+
+    async def aclose(self):
+        await self._client.aio.aclose()
+
+
+class AnthropicClient:
+    """A Claude client bound to one API key and model.
+
+    ``anthropic`` is only imported when a Claude model is first requested.
+    Gemini-style history is converted to Messages API turns. There is no
+    response schema support; the system prompt already asks for JSON.
+    """
+
+    max_tokens = 2048
+
+    def __init__(self, api_key: str, model: str):
+        anthropic = import_sdk("anthropic")
+        self.model = model
+        self._client = anthropic.AsyncAnthropic(api_key=api_key or None)
+
+    def _request(
+        self, history: list[dict], message: str, system_instruction: str | None
+    ) -> dict:
+        messages = []
+        for turn in [*history, {"role": "user", "parts": [{"text": message}]}]:
+            role = "assistant" if turn["role"] == "model" else "user"
+            text = "".join(part.get("text", "") for part in turn["parts"])
+            if not messages and role == "assistant":
+                messages.append({"role": "user", "content": "Hello."})
+            if messages and messages[-1]["role"] == role:
+                messages[-1]["content"] += "\n\n" + text
+            else:
+                messages.append({"role": role, "content": text})
+        request = {"model": self.model, "max_tokens": self.max_tokens, "messages": messages}
+        if system_instruction:
+            request["system"] = system_instruction
+        return request
+
+    async def send_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> str:
+        response = await self._client.messages.create(
+            **self._request(history, message, system_instruction)
+        )
+        return "".join(block.text for block in response.content if block.type == "text")
+
+    async def stream_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> AsyncIterator[str]:
+        async with self._client.messages.stream(
+            **self._request(history, message, system_instruction)
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    async def list_models(self) -> list[str]:
+        return sorted([m.id async for m in self._client.models.list()])
+
+    async def aclose(self):
+        await self._client.close()
+
+
+class _PooledClient:
+    def __init__(self, client, now: float):
+        self.client = client
+        self.last_used = now
+        self.leases = 0
+
+
+class ClientPool:
+    """LRU pool of LLM clients keyed by (API key fingerprint, model).
+
+    Clients idle for longer than ``idle_timeout`` seconds, or pushed out by
+    ``max_size``, are closed once no request holds them.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str, str], object] = GeminiClient,
+        max_size: int = 256,
+        idle_timeout: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], _PooledClient] = OrderedDict()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @contextlib.asynccontextmanager
+    async def client(self, api_key: str, model: str):
+        entry = self._acquire(api_key, model)
+        try:
+            yield entry.client
+        finally:
+            entry.leases -= 1
+            entry.last_used = self._clock()
+
+    def _acquire(self, api_key: str, model: str) -> _PooledClient:
+        now = self._clock()
+        key = (key_fingerprint(api_key), model)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PooledClient(self.factory(api_key, model), now)
+            self._entries[key] = entry
+            self.created += 1
+        else:
+            self._entries.move_to_end(key)
+            self.reused += 1
+        entry.leases += 1
+        entry.last_used = now
+        self._evict(now)
+        return entry
+
+    def _evict(self, now: float):
+        overflow = len(self._entries) - self.max_size
+        for key, entry in list(self._entries.items()):
+            if entry.leases:
+                continue
+            if overflow > 0 or now - entry.last_used > self.idle_timeout:
+                del self._entries[key]
+                overflow -= 1
+                self.evicted += 1
+                self._close(entry.client)
+
+    def _close(self, client):
+        aclose = getattr(client, "aclose", None)
+        if aclose is None:
+            return
+        task = asyncio.get_running_loop().create_task(aclose())
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "clients": len(self._entries),
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
+
+
+RESPONSE_CACHE = ResponseCache(
+    os.environ.get("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3"),
+    max_bytes=int(os.environ.get("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    mode=os.environ.get("LLM_CACHE_MODE", "cache"),
+)
+
+
+PROVIDERS = ("gemini", "anthropic", "fake")
+
+
+def split_model(model: str) -> tuple[str, str]:
+    """``"anthropic:claude-3-5-haiku-latest"`` -> provider and model; Gemini by default."""
+    provider, sep, name = model.partition(":")
+    if sep and provider in PROVIDERS:
+        return provider, name
+    return "gemini", model
+
+
+def create_client(api_key: str, model: str):
+    """Build the client for a possibly provider-prefixed model name.
+
+    Claude models use ``ANTHROPIC_API_KEY``; the session's key is a Gemini
+    key. ``fake:`` models are served offline by ``FakeLLMClient``.
+    """
+    provider, name = split_model(model)
+    if provider == "fake":
+        return FakeLLMClient(api_key, name)
+    if RESPONSE_CACHE.mode == "replay":
+        client = None
+    elif provider == "anthropic":
+        client = AnthropicClient(os.environ.get("ANTHROPIC_API_KEY", ""), name)
+    else:
+        client = GeminiClient(api_key, name)
+    return CachedClient(client, model, RESPONSE_CACHE, conforms)
+
+
+CLIENT_POOL = ClientPool(create_client)
+METRICS.register_gauges("llm_client_pool", CLIENT_POOL.stats)
+METRICS.register_gauges("llm_response_cache", RESPONSE_CACHE.stats)
@@ -0,0 +1,139 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Span:
+    __slots__ = ("_metrics", "_path", "_phase", "_start")
+
+    def __init__(self, metrics: "Metrics", path: str, phase: str):
+        self._metrics = metrics
+        self._path = path
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = {"path": self._path, "phase": self._phase}
+        self._metrics.observe("phase_duration_seconds", time.perf_counter() - self._start, **labels)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self._metrics.inc("errors_total", **labels, error=exc_type.__name__)
+        return False
+
+
+_NOOP_SPAN = contextlib.nullcontext()
+
+
+class Metrics:
+    """In-process counters and histograms rendered in Prometheus text format.
+
+    When disabled, ``span`` returns a shared no-op context manager and
+    ``observe``/``inc`` return immediately.
+    """
+
+    def __init__(self, enabled: bool = True, namespace: str = "extension_builder"):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[LabelKey, float]] = {}
+        self._histograms: dict[str, dict[LabelKey, _Histogram]] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {"prompt_tokens": TOKEN_BUCKETS}
+        self._gauges: dict[str, Callable[[], dict[str, float]]] = {}
+
+    def span(self, path: str, phase: str):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, path, phase)
+
+    def observe(self, name: str, value: float, **labels: str):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def register_gauges(self, name: str, collect: Callable[[], dict[str, float]]):
+        """Export ``collect()`` as ``<name>{stat="..."}`` gauges on every scrape."""
+        self._gauges[name] = collect
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_labels(key, le=f'{bound:g}')} {cumulative}")
+                    lines.append(f"{metric}_bucket{_labels(key, le='+Inf')} {histogram.count}")
+                    lines.append(f"{metric}_sum{_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{_labels(key)} {histogram.count}")
+        for name, collect in sorted(self._gauges.items()):
+            metric = f"{self.namespace}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for stat, value in sorted(collect().items()):
+                lines.append(f'{metric}{{stat="{stat}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    pairs = [*key, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+METRICS = Metrics(enabled=os.environ.get("METRICS_ENABLED", "1") != "0")
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable
+
+from app.services.metrics import METRICS
+
+
+def key_fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class ModelListCache:
+    """Process-wide cache of model lists keyed by API key fingerprint.
+
+    Fresh entries are served for ``ttl`` seconds; for a further ``stale_ttl``
+    seconds the stale list is served while one background refresh runs.
+    Concurrent misses for the same key share a single upstream fetch.
+    Entries older than ``ttl + stale_ttl`` are dropped on read and on every
+    store, so keys that stop being used do not accumulate.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        stale_ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: dict[str, tuple[float, list[str]]] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.upstream_calls = 0
+
+    async def get(
+        self, api_key: str, fetch: Callable[[], Awaitable[list[str]]]
+    ) -> list[str]:
+        fingerprint = key_fingerprint(api_key)
+        entry = self._entries.get(fingerprint)
+        if entry is not None:
+            stored_at, models = entry
+            age = self._clock() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return list(models)
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._load(fingerprint, fetch)
+                return list(models)
+            del self._entries[fingerprint]
+        self.misses += 1
+        return list(await asyncio.shield(self._load(fingerprint, fetch)))
+
+    def _load(
+        self, fingerprint: str, fetch: Callable[[], Awaitable[list[str]]]
+    ) -> asyncio.Task:
+        task = self._inflight.get(fingerprint)
+        if task is None:
+            task = asyncio.create_task(self._fetch(fingerprint, fetch))
+            self._inflight[fingerprint] = task
+            task.add_done_callback(lambda t: self._done(fingerprint, t))
+        return task
+
+    def _done(self, fingerprint: str, task: asyncio.Task):
+        self._inflight.pop(fingerprint, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(
+        self, fingerprint: str, fetch: Callable[[], Awaitable[list[str]]]
+    ) -> list[str]:
+        self.upstream_calls += 1
+        try:
+            models = await fetch()
+        except Exception as e:
+            logging.warning(f"Model list refresh failed: {e}")
+            raise
+        now = self._clock()
+        self._entries = {
+            key: entry
+            for key, entry in self._entries.items()
+            if now - entry[0] < self.ttl + self.stale_ttl
+        }
+        self._entries[fingerprint] = (now, list(models))
+        return models
+
+    def invalidate(self, api_key: str):
+        self._entries.pop(key_fingerprint(api_key), None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "upstream_calls": self.upstream_calls,
+            "entries": len(self._entries),
+        }
+
+
+MODEL_LIST_CACHE = ModelListCache()
+METRICS.register_gauges("model_list_cache", MODEL_LIST_CACHE.stats)
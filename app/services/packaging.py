@@ -0,0 +1,284 @@
+import hashlib
+import io
+import json
+import os
+import struct
+import zipfile
+import zlib
+from dataclasses import dataclass
+
+from app.services.artifacts import Artifact, ArtifactStore, content_digest
+from app.services.metrics import METRICS
+
+COMPRESSION_LEVEL = int(os.environ.get("PACKAGING_COMPRESSION_LEVEL", 6))
+ZIP_DOS_DATE = (1 << 5) | 1
+ZIP_DOS_TIME = 0
+ZIP_FILE_MODE = 0o644
+ZIP_UTF8_FLAG = 0x800
+ZIP_VERSION_MADE_BY = (3 << 8) | 20
+
+CONTENT_JS = """// Content script for your extension
+
+console.log('Content script loaded!');"""
+BACKGROUND_JS = """// Background script for your extension
+
+console.log('Background script loaded!');"""
+POPUP_HTML = "<html><head><title>Popup</title><link rel='stylesheet' href='popup.css'></head><body><h1>Extension Popup</h1><script src='popup.js'></script></body></html>"
+POPUP_JS = "console.log('Popup script loaded!');"
+POPUP_CSS = "body { width: 200px; font-family: sans-serif; text-align: center; }"
+OPTIONS_HTML = "<html><head><title>Options</title><link rel='stylesheet' href='options.css'></head><body><h1>Extension Options</h1><script src='options.js'></script></body></html>"
+OPTIONS_JS = "console.log('Options script loaded!');"
+OPTIONS_CSS = "body { width: 400px; font-family: sans-serif; }"
+
+# Script assets: the manifest key that enables each one and its files.
+ASSETS = {
+    "content": ("content_scripts", ("content.js",)),
+    "background": ("background", ("background.js",)),
+    "popup": ("action", ("popup.html", "popup.js", "popup.css")),
+    "options": ("options_ui", ("options.html", "options.js", "options.css")),
+}
+PLACEHOLDERS = {
+    "content.js": CONTENT_JS,
+    "background.js": BACKGROUND_JS,
+    "popup.html": POPUP_HTML,
+    "popup.js": POPUP_JS,
+    "popup.css": POPUP_CSS,
+    "options.html": OPTIONS_HTML,
+    "options.js": OPTIONS_JS,
+    "options.css": OPTIONS_CSS,
+}
+
+TARGETS = ("Chrome", "Firefox")
+
+
+def create_manifest(requirements: dict, target: str | None = None) -> dict:
+    """Build the MV3 manifest, optionally specialised for one browser.
+
+    Without a target the manifest covers every requested browser at once.
+    """
+    manifest = {
+        "manifest_version": 3,
+        "name": requirements["name"],
+        "version": "1.0",
+        "description": requirements["description"],
+    }
+    if requirements.get("has_background_script"):
+        if target == "Firefox":
+            manifest["background"] = {"scripts": ["background.js"]}
+        else:
+            manifest["background"] = {"service_worker": "background.js"}
+    if requirements.get("inject_urls"):
+        manifest["content_scripts"] = [
+            {"matches": requirements["inject_urls"], "js": ["content.js"]}
+        ]
+    if requirements.get("has_popup"):
+        manifest["action"] = {"default_popup": "popup.html"}
+    if requirements.get("has_options_page"):
+        manifest["options_ui"] = {"page": "options.html", "open_in_tab": True}
+    if target == "Firefox" or (
+        target is None and "Firefox" in requirements.get("target_browser", [])
+    ):
+        manifest["browser_specific_settings"] = {
+            "gecko": {
+                "id": f"{requirements['name'].lower().replace(' ', '-')}@example.com"
+            }
+        }
+    return manifest
+
+
+def build_targets(requirements: dict) -> list[str]:
+    targets = [t for t in TARGETS if t in requirements.get("target_browser", [])]
+    return targets or [TARGETS[0]]
+
+
+def variant_session(session: str, target: str) -> str:
+    return f"{session}:{target}" if session else ""
+
+
+def release_variants(store: ArtifactStore, session: str, keep: tuple[str, ...] = ()):
+    """Drop the session's references to every target variant not in ``keep``."""
+    for target in TARGETS:
+        if session and target not in keep:
+            store.release(variant_session(session, target))
+
+
+def archive_name(name: str) -> str:
+    return "".join(filter(str.isalnum, name)).lower() or "my_extension"
+
+
+def enabled_assets(manifest: dict) -> list[str]:
+    return [kind for kind, (key, _) in ASSETS.items() if manifest.get(key)]
+
+
+def build_extension_files(
+    manifest: dict, assets: dict[str, str] | None = None
+) -> dict[str, bytes]:
+    """Render the archive files; ``assets`` overrides placeholder sources by file name."""
+    assets = assets or {}
+    files = {"manifest.json": json.dumps(manifest, indent=2).encode()}
+    for kind in enabled_assets(manifest):
+        for name in ASSETS[kind][1]:
+            files[name] = assets.get(name, PLACEHOLDERS[name]).encode()
+    return files
+
+
+@dataclass
+class ZipEntry:
+    name: str
+    data_size: int
+    crc: int
+    method: int
+    payload: bytes
+
+
+def compress_entry(
+    name: str, data: bytes, compression_level: int = COMPRESSION_LEVEL
+) -> ZipEntry:
+    """Compress one archive member so it can be reused across archives."""
+    if compression_level:
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        payload = compressor.compress(data) + compressor.flush()
+        method = zipfile.ZIP_DEFLATED
+    else:
+        payload = data
+        method = zipfile.ZIP_STORED
+    return ZipEntry(name, len(data), zlib.crc32(data), method, payload)
+
+
+def write_zip(entries: list[ZipEntry]) -> tuple[bytes, str]:
+    """Assemble precompressed entries into a reproducible zip archive.
+
+    Entries are sorted and carry fixed timestamps and permissions, so equal
+    inputs always produce byte-identical archives. Returns the archive and
+    its SHA-256, computed as the bytes are written.
+    """
+    buffer = io.BytesIO()
+    sha256 = hashlib.sha256()
+    central = []
+
+    def write(data: bytes):
+        sha256.update(data)
+        buffer.write(data)
+
+    for entry in sorted(entries, key=lambda e: e.name):
+        name = entry.name.encode()
+        flags = 0 if entry.name.isascii() else ZIP_UTF8_FLAG
+        fields = (
+            20,
+            flags,
+            entry.method,
+            ZIP_DOS_TIME,
+            ZIP_DOS_DATE,
+            entry.crc,
+            len(entry.payload),
+            entry.data_size,
+            len(name),
+            0,
+        )
+        offset = buffer.tell()
+        write(struct.pack("<4s5H3L2H", b"PK\x03\x04", *fields))
+        write(name)
+        write(entry.payload)
+        central.append(
+            struct.pack(
+                "<4s6H3L5HLL",
+                b"PK\x01\x02",
+                ZIP_VERSION_MADE_BY,
+                *fields,
+                0,
+                0,
+                0,
+                ZIP_FILE_MODE << 16,
+                offset,
+            )
+            + name
+        )
+    directory_offset = buffer.tell()
+    for record in central:
+        write(record)
+    write(
+        struct.pack(
+            "<4s4H2LH",
+            b"PK\x05\x06",
+            0,
+            0,
+            len(central),
+            len(central),
+            buffer.tell() - directory_offset,
+            directory_offset,
+            0,
+        )
+    )
+    return buffer.getvalue(), sha256.hexdigest()
+
+
+def build_zip(
+    files: dict[str, bytes], compression_level: int = COMPRESSION_LEVEL
+) -> tuple[bytes, str]:
+    return write_zip(
+        [compress_entry(name, data, compression_level) for name, data in files.items()]
+    )
+
+
+def package_extension(
+    requirements: dict,
+    store: ArtifactStore,
+    session: str = "",
+    compression_level: int = COMPRESSION_LEVEL,
+    assets: dict[str, str] | None = None,
+) -> dict[str, Artifact]:
+    """Build one archive per target browser and store each under its digest.
+
+    Assets shared by every target are rendered and compressed once; only
+    the manifest differs, so each extra variant costs one small archive
+    assembly and store write.
+    Targets whose archive is already stored are reused without re-zipping.
+    The session's references to targets it no longer builds are released.
+    ``assets`` holds generated sources by file name; missing files fall
+    back to placeholders.
+    Blocking; run it off the event loop.
+    """
+    with METRICS.span("generate_extension", "manifest_build"):
+        manifests = {
+            target: create_manifest(requirements, target)
+            for target in build_targets(requirements)
+        }
+    release_variants(store, session, keep=tuple(manifests))
+    with METRICS.span("generate_extension", "asset_render"):
+        files = build_extension_files(next(iter(manifests.values())), assets)
+        del files["manifest.json"]
+    artifacts = {}
+    digests = {}
+    for target, manifest in manifests.items():
+        digests[target] = content_digest(manifest, files)
+        artifact = store.get(digests[target], variant_session(session, target))
+        if artifact is not None:
+            METRICS.inc("artifact_reuse_total")
+            artifacts[target] = artifact
+    missing = [target for target in manifests if target not in artifacts]
+    if not missing:
+        return artifacts
+    with METRICS.span("generate_extension", "zip"):
+        shared = [
+            compress_entry(name, data, compression_level)
+            for name, data in files.items()
+        ]
+
+    def build_variant(target: str) -> Artifact:
+        with METRICS.span("generate_extension", "zip"):
+            manifest = json.dumps(manifests[target], indent=2).encode()
+            archive, archive_sha256 = write_zip(
+                [*shared, compress_entry("manifest.json", manifest, compression_level)]
+            )
+        with METRICS.span("generate_extension", "write"):
+            return store.put(
+                digests[target],
+                f"{archive_name(requirements['name'])}-{target.lower()}.zip",
+                archive,
+                archive_sha256,
+                variant_session(session, target),
+            )
+
+    for target in missing:
+        artifacts[target] = build_variant(target)
+    return {target: artifacts[target] for target in manifests}
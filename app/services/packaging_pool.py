@@ -0,0 +1,161 @@
+import asyncio
+import collections
+import contextlib
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+from app.services.metrics import METRICS
+
+
+class PackagingQueueFull(RuntimeError):
+    pass
+
+
+class PackagingCancelled(RuntimeError):
+    pass
+
+
+class PackagingTimeout(asyncio.TimeoutError):
+    pass
+
+
+@dataclass
+class JobUpdate:
+    status: str
+    position: int = 0
+    result: Any = None
+
+
+class _Job:
+    def __init__(self, owner: str):
+        self.owner = owner
+        self.ready = asyncio.Event()
+        self.changed = asyncio.Event()
+        self.cancelled = False
+
+
+class PackagingExecutor:
+    """Run blocking packaging jobs on a bounded thread pool.
+
+    At most ``max_queue`` jobs wait for one of ``max_workers`` threads;
+    further submissions raise ``PackagingQueueFull``. ``submit`` yields
+    ``JobUpdate``s (queued with a 1-based position, building, done). A job
+    is cancelled when its owner submits a newer job, when ``cancel`` is
+    called, or when ``is_alive`` reports the session has gone away. A job
+    that times out keeps its thread slot until the work actually finishes.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue: int = 16,
+        timeout: float = 60.0,
+        poll_interval: float = 1.0,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="packaging")
+        self._waiting: collections.deque[_Job] = collections.deque()
+        self._owners: dict[str, _Job] = {}
+        self._running = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def idle(self) -> bool:
+        return not self._waiting and self._running < self.max_workers
+
+    def cancel(self, owner: str):
+        job = self._owners.get(owner)
+        if job is not None:
+            job.cancelled = True
+            job.changed.set()
+
+    def _dispatch(self):
+        while self._waiting and self._running < self.max_workers:
+            job = self._waiting.popleft()
+            self._running += 1
+            job.ready.set()
+        for job in self._waiting:
+            job.changed.set()
+
+    def _release(self):
+        self._running -= 1
+        self._dispatch()
+
+    def _leave_queue(self, job: _Job):
+        with contextlib.suppress(ValueError):
+            self._waiting.remove(job)
+            self._dispatch()
+
+    async def submit(
+        self,
+        fn: Callable,
+        *args,
+        owner: str = "",
+        is_alive: Callable[[], bool] | None = None,
+    ) -> AsyncIterator[JobUpdate]:
+        if len(self._waiting) >= self.max_queue:
+            METRICS.inc("packaging_rejected_total")
+            raise PackagingQueueFull(
+                "Too many extensions are being generated right now. Please try again shortly."
+            )
+        if owner:
+            self.cancel(owner)
+        job = _Job(owner)
+        if owner:
+            self._owners[owner] = job
+        self._waiting.append(job)
+        self._dispatch()
+        future = None
+        try:
+            position = 0
+            while not job.ready.is_set():
+                if job.cancelled or (is_alive is not None and not is_alive()):
+                    raise PackagingCancelled("Packaging job was cancelled.")
+                if self._waiting.index(job) + 1 != position:
+                    position = self._waiting.index(job) + 1
+                    yield JobUpdate("queued", position)
+                job.changed.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(job.changed.wait(), self.poll_interval)
+            yield JobUpdate("building")
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(fn, *args)
+            )
+            future.add_done_callback(lambda _: self._release())
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                METRICS.inc("packaging_timeouts_total")
+                raise PackagingTimeout(
+                    "Packaging the extension took too long and was stopped. Please try again."
+                ) from None
+            if job.cancelled:
+                raise PackagingCancelled("Packaging job was cancelled.")
+            yield JobUpdate("done", result=result)
+        finally:
+            if job.ready.is_set() and future is None:
+                self._release()
+            elif not job.ready.is_set():
+                self._leave_queue(job)
+            if self._owners.get(owner) is job:
+                del self._owners[owner]
+
+    def stats(self) -> dict[str, int]:
+        return {"queued": len(self._waiting), "running": self._running}
+
+
+PACKAGING_EXECUTOR = PackagingExecutor(
+    max_workers=int(os.environ.get("PACKAGING_WORKERS", 2)),
+    max_queue=int(os.environ.get("PACKAGING_MAX_QUEUE", 16)),
+    timeout=float(os.environ.get("PACKAGING_TIMEOUT", 60)),
+)
+METRICS.register_gauges("packaging_executor", PACKAGING_EXECUTOR.stats)
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+CACHE_MODES = ("off", "cache", "record", "replay")
+
+
+def request_key(
+    model: str,
+    history: list[dict],
+    message: str,
+    system_instruction: str | None,
+    response_schema: dict | None = None,
+) -> str:
+    request = {
+        "model": model,
+        "system_instruction": system_instruction or "",
+        "history": history,
+        "message": message,
+    }
+    if response_schema:
+        request["response_schema"] = response_schema
+    payload = json.dumps(
+        request,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed LLM response store in SQLite with an LRU size cap.
+
+    Modes: ``off`` bypasses the cache, ``cache`` reads through and stores
+    misses, ``record`` always calls the model and overwrites entries, and
+    ``replay`` serves only stored responses and never calls the model.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 64 * 1024 * 1024, mode: str = "cache"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode!r}")
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        size = len(response.encode())
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            while total > self.max_bytes:
+                row = conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+                total -= row[1]
+            conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "rejected": self.rejected}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _schema(response_schema: dict | None) -> dict:
+    return {"response_schema": response_schema} if response_schema else {}
+
+
+class CachedClient:
+    """Wrap an LLM client with a ``ResponseCache``; ``client`` may be None in replay mode.
+
+    ``validate(response, response_schema)`` decides whether a reply may be
+    stored, so a malformed or truncated reply is never replayed.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        cache: ResponseCache,
+        validate: Callable[[str, dict | None], bool] | None = None,
+    ):
+        self.client = client
+        self.model = model
+        self.cache = cache
+        self.validate = validate
+
+    async def _lookup(self, key: str) -> str | None:
+        if self.cache.mode not in ("cache", "replay"):
+            return None
+        response = await asyncio.to_thread(self.cache.get, key)
+        if response is None and self.cache.mode == "replay":
+            raise LookupError("No recorded LLM response for this request.")
+        return response
+
+    async def _store(self, key: str, response: str, response_schema: dict | None):
+        if self.cache.mode not in ("cache", "record"):
+            return
+        if self.validate is not None and not self.validate(response, response_schema):
+            self.cache.rejected += 1
+            return
+        await asyncio.to_thread(self.cache.put, key, response)
+
+    async def send_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> str:
+        key = request_key(self.model, history, message, system_instruction, response_schema)
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.client.send_message(
+            history, message, system_instruction, **_schema(response_schema)
+        )
+        await self._store(key, response, response_schema)
+        return response
+
+    async def stream_message(
+        self,
+        history: list[dict],
+        message: str,
+        system_instruction: str | None = None,
+        response_schema: dict | None = None,
+    ) -> AsyncIterator[str]:
+        key = request_key(self.model, history, message, system_instruction, response_schema)
+        cached = await self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for text in self.client.stream_message(
+            history, message, system_instruction, **_schema(response_schema)
+        ):
+            chunks.append(text)
+            yield text
+        await self._store(key, "".join(chunks), response_schema)
+
+    async def list_models(self) -> list[str]:
+        if self.client is None:
+            return [self.model]
+        return await self.client.list_models()
+
+    async def aclose(self):
+        if self.client is not None and hasattr(self.client, "aclose"):
+            await self.client.aclose()
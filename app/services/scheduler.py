@@ -0,0 +1,261 @@
+import asyncio
+import collections
+import contextlib
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from app.services.metrics import METRICS
+from app.services.model_cache import key_fingerprint
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def status_code(exc: BaseException) -> int | None:
+    """HTTP status of an SDK error (``google.genai.errors.APIError.code``)."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Server-requested delay from a Retry-After header or a RetryInfo detail."""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        value = headers.get("retry-after")
+    if value is None:
+        details = getattr(exc, "details", None)
+        error = details.get("error", {}) if isinstance(details, dict) else {}
+        for detail in error.get("details", []):
+            if str(detail.get("@type", "")).endswith("RetryInfo"):
+                value = str(detail.get("retryDelay", "")).rstrip("s")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class LLMUpdate:
+    status: str
+    position: int = 0
+    wait: float = 0.0
+    attempt: int = 0
+    result: Any = None
+
+
+class _Ticket:
+    def __init__(self, session: str):
+        self.session = session
+        self.ready = asyncio.Event()
+        self.changed = asyncio.Event()
+
+
+@dataclass
+class _KeyState:
+    tokens: float
+    updated: float
+    running: int = 0
+    blocked_until: float = 0.0
+    queues: dict[str, collections.deque[_Ticket]] = field(default_factory=dict)
+    served: dict[str, int] = field(default_factory=dict)
+    sequence: int = 0
+
+
+class LLMScheduler:
+    """Admit LLM calls per API key through a token bucket and concurrency cap.
+
+    Waiting calls go to the session served least recently, so one busy tab
+    cannot starve the others sharing a key. Calls failing with 429/5xx are
+    retried after the server's Retry-After, or a jittered exponential
+    backoff; a 429 also pauses the whole key for that long. ``submit``
+    yields ``LLMUpdate``s (queued with a 1-based position and estimated
+    wait, retrying with the delay, done with the result).
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 4,
+        max_concurrency: int = 4,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        seed: int | None = None,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._random = random.Random(seed)
+        self._keys: dict[str, _KeyState] = {}
+        self.retries = 0
+
+    def queue_depth(self) -> int:
+        return sum(len(q) for key in self._keys.values() for q in key.queues.values())
+
+    def _key(self, api_key: str) -> _KeyState:
+        fingerprint = key_fingerprint(api_key)
+        key = self._keys.get(fingerprint)
+        if key is None:
+            self._prune(self._clock())
+            key = self._keys[fingerprint] = _KeyState(self.burst, self._clock())
+        return key
+
+    def _prune(self, now: float):
+        """Forget idle keys whose bucket would be full again anyway."""
+        for fingerprint, key in list(self._keys.items()):
+            if key.running or key.queues or now < key.blocked_until:
+                continue
+            if key.tokens + (now - key.updated) * self.rate >= self.burst:
+                del self._keys[fingerprint]
+
+    def _refill(self, key: _KeyState, now: float):
+        key.tokens = min(self.burst, key.tokens + (now - key.updated) * self.rate)
+        key.updated = now
+
+    def _dispatch(self, key: _KeyState):
+        now = self._clock()
+        self._refill(key, now)
+        while (
+            key.queues
+            and key.running < self.max_concurrency
+            and key.tokens >= 1
+            and now >= key.blocked_until
+        ):
+            session = self._next_session(key.queues, key.served)
+            ticket = key.queues[session].popleft()
+            if not key.queues[session]:
+                del key.queues[session]
+            key.sequence += 1
+            key.served[session] = key.sequence
+            key.tokens -= 1
+            key.running += 1
+            ticket.ready.set()
+        if not key.queues and not key.running:
+            key.served.clear()
+        for queue in key.queues.values():
+            for ticket in queue:
+                ticket.changed.set()
+
+    @staticmethod
+    def _next_session(queues: dict, served: dict[str, int]) -> str:
+        """The waiting session served least recently, oldest arrival first."""
+        return min(queues, key=lambda session: served.get(session, 0))
+
+    def _position(self, key: _KeyState, ticket: _Ticket) -> int:
+        """1-based place in the order ``_dispatch`` will follow."""
+        queues = {session: list(queue) for session, queue in key.queues.items()}
+        served = dict(key.served)
+        sequence = key.sequence
+        position = 1
+        while True:
+            session = self._next_session(queues, served)
+            if queues[session].pop(0) is ticket:
+                return position
+            if not queues[session]:
+                del queues[session]
+            sequence += 1
+            served[session] = sequence
+            position += 1
+
+    def _estimated_wait(self, key: _KeyState, position: int) -> float:
+        now = self._clock()
+        return max(key.blocked_until - now, (position - key.tokens) / self.rate, 0.0)
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        delay = self._random.uniform(delay / 2, delay)
+        return max(delay, retry_after(exc) or 0.0)
+
+    def _enqueue(self, key: _KeyState, ticket: _Ticket):
+        key.queues.setdefault(ticket.session, collections.deque()).append(ticket)
+        self._dispatch(key)
+
+    def _leave_queue(self, key: _KeyState, ticket: _Ticket):
+        queue = key.queues.get(ticket.session)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del key.queues[ticket.session]
+            self._dispatch(key)
+
+    def _release(self, key: _KeyState):
+        key.running -= 1
+        self._dispatch(key)
+
+    async def _admit(self, key: _KeyState, ticket: _Ticket) -> AsyncIterator[LLMUpdate]:
+        position = 0
+        while not ticket.ready.is_set():
+            self._dispatch(key)
+            if ticket.ready.is_set():
+                break
+            if self._position(key, ticket) != position:
+                position = self._position(key, ticket)
+                yield LLMUpdate("queued", position, self._estimated_wait(key, position))
+            ticket.changed.clear()
+            timeout = min(
+                self.poll_interval,
+                max(key.blocked_until - self._clock(), (1 - key.tokens) / self.rate, 0.01),
+            )
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(ticket.changed.wait(), timeout)
+
+    async def submit(
+        self, api_key: str, session: str, call: Callable[[], Awaitable[Any]]
+    ) -> AsyncIterator[LLMUpdate]:
+        attempt = 0
+        while True:
+            key = self._key(api_key)
+            ticket = _Ticket(session)
+            self._enqueue(key, ticket)
+            queued_at = self._clock()
+            try:
+                async for update in self._admit(key, ticket):
+                    yield update
+                METRICS.observe("llm_queue_wait_seconds", self._clock() - queued_at)
+                try:
+                    result = await call()
+                    break
+                except Exception as e:
+                    status = status_code(e)
+                    if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt, e)
+                    if status == 429:
+                        key.blocked_until = max(key.blocked_until, self._clock() + delay)
+            finally:
+                if ticket.ready.is_set():
+                    self._release(key)
+                else:
+                    self._leave_queue(key, ticket)
+            attempt += 1
+            self.retries += 1
+            METRICS.inc("llm_retries_total", status=str(status))
+            yield LLMUpdate("retrying", wait=delay, attempt=attempt)
+            await asyncio.sleep(delay)
+        yield LLMUpdate("done", result=result)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "keys": len(self._keys),
+            "queued": self.queue_depth(),
+            "running": sum(key.running for key in self._keys.values()),
+            "retries": self.retries,
+        }
+
+
+LLM_SCHEDULER = LLMScheduler(
+    rate=float(os.environ.get("LLM_RATE_PER_KEY", 1.0)),
+    burst=int(os.environ.get("LLM_BURST_PER_KEY", 4)),
+    max_concurrency=int(os.environ.get("LLM_CONCURRENCY_PER_KEY", 4)),
+)
+METRICS.register_gauges("llm_scheduler", LLM_SCHEDULER.stats)
@@ -0,0 +1,144 @@
+import json
+import time
+
+
+def extract_json_object(response_text: str) -> dict:
+    response_text = response_text.strip()
+    json_start = response_text.find("{")
+    json_end = response_text.rfind("}") + 1
+    if json_start == -1 or json_end == 0:
+        raise ValueError("AI response did not contain a valid JSON object.")
+    return json.loads(response_text[json_start:json_end])
+
+
+class ResponseStreamParser:
+    """Incrementally scan a streamed JSON reply for its ``response`` field.
+
+    The reply may be wrapped in prose or code fences; everything before the
+    first ``{`` is ignored, and the object is complete once its closing brace
+    arrives.
+    """
+
+    def __init__(self, field: str = "response"):
+        self.field = field
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = ""
+        self._expect_value = False
+        self._object_start = -1
+        self._object_end = -1
+        self._value_start = -1
+        self._value_end = -1
+        self.response_text = ""
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return self._buffer
+
+    @property
+    def complete(self) -> bool:
+        return self._object_end != -1
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return True when ``response_text`` changed."""
+        if self.complete or not chunk:
+            return False
+        self._buffer += chunk
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_start == self._value_start:
+                        self._value_end = i
+                    self._last_string = buffer[self._string_start : i]
+            elif self._object_start == -1:
+                if char == "{":
+                    self._object_start = i
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+                self._string_start = i + 1
+                if (
+                    self._depth == 1
+                    and self._expect_value
+                    and self._value_start == -1
+                    and self._last_string == self.field
+                ):
+                    self._value_start = i + 1
+                self._expect_value = False
+            elif char == ":":
+                self._expect_value = True
+            elif char in "{[":
+                self._depth += 1
+                self._expect_value = False
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._object_end = i + 1
+                    self._pos = i + 1
+                    break
+            elif char == ",":
+                self._last_string = ""
+                self._expect_value = False
+        else:
+            self._pos = len(buffer)
+        return self._update_response_text()
+
+    def _update_response_text(self) -> bool:
+        if self._value_start == -1:
+            return False
+        end = self._value_end if self._value_end != -1 else self._pos
+        raw = self._buffer[self._value_start : end]
+        if self._value_end == -1:
+            raw = _trim_partial_escape(raw)
+        try:
+            text = json.loads(f'"{raw}"', strict=False)
+        except json.JSONDecodeError:
+            return False
+        if text == self.response_text:
+            return False
+        self.response_text = text
+        return True
+
+    def result(self) -> dict:
+        if not self.complete:
+            raise ValueError("AI response did not contain a valid JSON object.")
+        return json.loads(self._buffer[self._object_start : self._object_end])
+
+
+def _trim_partial_escape(raw: str) -> str:
+    backslashes = len(raw) - len(raw.rstrip("\\"))
+    if backslashes % 2:
+        return raw[:-1]
+    unicode_start = raw.rfind("\\u", max(len(raw) - 5, 0))
+    if unicode_start != -1:
+        prefix = raw[:unicode_start]
+        if (len(prefix) - len(prefix.rstrip("\\"))) % 2 == 0:
+            return prefix
+    return raw
+
+
+class Throttle:
+    """Let an action through at most once per ``interval`` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = float("-inf")
+
+    def ready(self) -> bool:
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
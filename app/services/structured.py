@@ -0,0 +1,205 @@
+import json
+import re
+
+from app.services.metrics import METRICS
+from app.services.streaming import extract_json_object
+
+BROWSERS = ("Chrome", "Firefox")
+TEXT_FIELDS = ("name", "description")
+FLAG_FIELDS = ("has_background_script", "has_popup", "has_options_page")
+
+# Gemini structured-output schema for a chat reply. Requirement fields are
+# optional so the model can send only what changed this turn.
+REPLY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "response": {"type": "STRING"},
+        "requirements": {
+            "type": "OBJECT",
+            "properties": {
+                "name": {"type": "STRING"},
+                "description": {"type": "STRING"},
+                "target_browser": {
+                    "type": "ARRAY",
+                    "items": {"type": "STRING", "enum": list(BROWSERS)},
+                },
+                "inject_urls": {"type": "ARRAY", "items": {"type": "STRING"}},
+                **{field: {"type": "BOOLEAN"} for field in FLAG_FIELDS},
+            },
+        },
+    },
+    "required": ["response"],
+}
+
+CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def repair_json(text: str) -> dict:
+    """Recover a JSON object from a fenced, comma-trailing or truncated reply."""
+    fenced = CODE_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("AI response did not contain a valid JSON object.")
+    text = _close_truncated(text[start:])
+    text = _outside_strings(text, lambda chunk: TRAILING_COMMA.sub(r"\1", chunk))
+    value = json.loads(text, strict=False)
+    if not isinstance(value, dict):
+        raise ValueError("AI response did not contain a valid JSON object.")
+    return value
+
+
+def _outside_strings(text: str, fix) -> str:
+    """Apply ``fix`` to the parts of ``text`` that are not inside JSON strings."""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(part if i % 2 else fix(part) for i, part in enumerate(parts))
+
+
+def _close_truncated(text: str) -> str:
+    """Cut ``text`` after its first complete object, or close what is open.
+
+    Only the top-level ``response`` string is salvaged from a truncated
+    reply. Any other cut-off value - a string, a list or an object nested
+    below the top level - is dropped together with its key, as is a
+    dangling key, separator or partial literal.
+    """
+    stack = []
+    opens = []
+    in_string = escape = False
+    string_start = 0
+    for i, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            string_start = i
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            opens.append(i)
+        elif char in "}]":
+            stack.pop()
+            opens.pop()
+            if not stack:
+                return text[: i + 1]
+    if len(stack) > 2:
+        text = text[: opens[2]]
+        del stack[2:]
+        in_string = False
+    if in_string:
+        before = text[:string_start].rstrip()
+        key = re.search(r'"((?:[^"\\]|\\.)*)"\s*:$', before)
+        if len(stack) == 1 and key and key.group(1) == "response":
+            text = (text[:-1] if escape else text) + '"'
+        else:
+            text = before
+    in_object = stack[-1] == "}"
+    text = text.rstrip()
+    literal = re.search(r"[A-Za-z]+$", text)
+    if literal and literal.group() not in ("true", "false", "null"):
+        text = text[: literal.start()].rstrip()
+    if text.endswith(":"):
+        text = re.sub(r'"(?:[^"\\]|\\.)*"\s*:$', "", text).rstrip()
+    elif in_object and re.search(r'[{,]\s*"(?:[^"\\]|\\.)*"$', text):
+        text = re.sub(r'"(?:[^"\\]|\\.)*"$', "", text).rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    return text + "".join(reversed(stack))
+
+
+def _checked(reply: dict) -> dict:
+    response = reply.get("response")
+    if not isinstance(response, str) or not response.strip():
+        raise ValueError("AI response did not contain a reply message.")
+    return reply
+
+
+def conforms(text: str, response_schema: dict | None) -> bool:
+    """Whether ``text`` is an intact reply for ``response_schema``; any text is fine without one.
+
+    Repaired replies do not count, and required string fields must be
+    non-empty.
+    """
+    if not response_schema:
+        return True
+    try:
+        reply = extract_json_object(text)
+    except ValueError:
+        return False
+    properties = response_schema.get("properties", {})
+    for field in response_schema.get("required", []):
+        value = reply.get(field)
+        if value is None:
+            return False
+        if properties.get(field, {}).get("type") == "STRING" and (
+            not isinstance(value, str) or not value.strip()
+        ):
+            return False
+    return True
+
+
+def parse_reply(text: str) -> dict:
+    """Parse a model reply, falling back to ``repair_json``; track the outcome.
+
+    A reply without a non-empty ``response`` string counts as failed.
+    """
+    try:
+        reply = _checked(extract_json_object(text))
+        METRICS.inc("llm_parse_total", outcome="ok")
+        return reply
+    except ValueError:
+        pass
+    try:
+        reply = _checked(repair_json(text))
+    except ValueError:
+        METRICS.inc("llm_parse_total", outcome="failed")
+        raise
+    METRICS.inc("llm_parse_total", outcome="repaired")
+    return reply
+
+
+def _valid_field(field: str, value):
+    if field in TEXT_FIELDS:
+        return value.strip() if isinstance(value, str) else None
+    if field in FLAG_FIELDS:
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        return value if isinstance(value, bool) else None
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        return None
+    if field == "target_browser":
+        by_name = {b.lower(): b for b in BROWSERS}
+        browsers = [by_name.get(v.strip().lower()) for v in value]
+        return None if None in browsers else list(dict.fromkeys(browsers))
+    return list(dict.fromkeys(v.strip() for v in value if v.strip()))
+
+
+def merge_requirements(current: dict, delta) -> dict:
+    """Apply the valid fields of ``delta`` to a copy of ``current``.
+
+    Unknown fields and values of the wrong shape are dropped (and counted)
+    instead of replacing good state; an empty name or description never
+    clears a known one.
+    """
+    merged = dict(current)
+    if not isinstance(delta, dict):
+        return merged
+    for field, value in delta.items():
+        if field not in current:
+            # Model-chosen names would make unbounded label values.
+            METRICS.inc("requirements_rejected_fields_total", field="unknown")
+            continue
+        valid = _valid_field(field, value)
+        if valid is None:
+            METRICS.inc("requirements_rejected_fields_total", field=field)
+            continue
+        if field in TEXT_FIELDS and not valid and current[field]:
+            continue
+        merged[field] = valid
+    return merged
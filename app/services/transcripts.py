@@ -0,0 +1,91 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+
+from app.services.metrics import METRICS
+
+
+class TranscriptStore:
+    """Append-only chat transcripts in SQLite, one zlib-compressed row per message.
+
+    Messages are addressed by ``(session, seq)`` where ``seq`` is the
+    message's position in the full conversation, so live state can keep a
+    short tail and page older messages back in by position.
+    """
+
+    def __init__(self, path: str | Path, level: int = 6):
+        self.path = Path(path)
+        self.level = level
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self.appended = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "session TEXT NOT NULL, seq INTEGER NOT NULL, body BLOB NOT NULL, "
+                "PRIMARY KEY (session, seq)) WITHOUT ROWID"
+            )
+        return self._conn
+
+    def append(self, session: str, start: int, messages: list[dict]):
+        """Store ``messages`` at positions ``start``, ``start + 1``, ..."""
+        rows = []
+        raw_bytes = 0
+        for seq, message in enumerate(messages, start=start):
+            raw = json.dumps([message["role"], message["content"]]).encode()
+            raw_bytes += len(raw)
+            rows.append((session, seq, zlib.compress(raw, self.level)))
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?)", rows)
+            conn.commit()
+            self.appended += len(rows)
+            self.raw_bytes += raw_bytes
+            self.stored_bytes += sum(len(row[2]) for row in rows)
+
+    def load(self, session: str, start: int, end: int) -> list[dict]:
+        """Messages with positions in ``[start, end)``, oldest first."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT body FROM messages WHERE session = ? AND seq >= ? AND seq < ? "
+                "ORDER BY seq",
+                (session, start, end),
+            ).fetchall()
+        messages = []
+        for (body,) in rows:
+            role, content = json.loads(zlib.decompress(body))
+            messages.append({"role": role, "content": content})
+        return messages
+
+    def count(self, session: str) -> int:
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM messages WHERE session = ?", (session,)
+            ).fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "appended": self.appended,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+TRANSCRIPTS = TranscriptStore(os.environ.get("TRANSCRIPT_DB_PATH", "data/transcripts.sqlite3"))
+METRICS.register_gauges("transcripts", TRANSCRIPTS.stats)
@@ -1,16 +1,106 @@
 import reflex as rx
 import asyncio
-import zipfile
-import os
+import copy
+import functools
 import logging
+import os
+import time
 from typing import TypedDict
 import json
+from app.services.artifacts import ARTIFACTS_DIR, ArtifactStore
+from app.services.codegen import ASSET_GENERATOR
+from app.services.context import ConversationWindow, PromptWindow
+from app.services.fast_path import extract_answer, infer_pending_field
+from app.services.hedging import LLM_ROUTER
+from app.services.llm import CLIENT_POOL, split_model
+from app.services.metrics import METRICS
+from app.services.model_cache import MODEL_LIST_CACHE
+from app.services.packaging import (
+    COMPRESSION_LEVEL,
+    create_manifest,
+    package_extension,
+    release_variants,
+    variant_session,
+)
+from app.services.packaging_pool import (
+    PACKAGING_EXECUTOR,
+    PackagingCancelled,
+    PackagingQueueFull,
+    PackagingTimeout,
+)
+from app.services.scheduler import LLM_SCHEDULER
+from app.services.streaming import Throttle
+from app.services.structured import REPLY_SCHEMA, merge_requirements
+from app.services.transcripts import TRANSCRIPTS
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+STREAM_RESPONSES = os.environ.get("LLM_STREAM_RESPONSES", "1") != "0"
+STREAM_PUSH_INTERVAL = 0.1
+CONTEXT_WINDOW = ConversationWindow(token_budget=4000, keep_turns=6)
+FAST_PATH_MIN_CONFIDENCE = 0.9
+HISTORY_TAIL = 40
+HISTORY_PAGE = 20
+
+
+@functools.cache
+def _artifact_store() -> ArtifactStore:
+    store = ArtifactStore(ARTIFACTS_DIR)
+    METRICS.register_gauges("artifact_store", store.stats)
+    return store
+
+
+def _client_connected(client_token: str) -> bool:
+    from app.app import app
+
+    namespace = app.event_namespace
+    return namespace is None or client_token in namespace.token_to_sid
+
+
+def _downloads(artifacts: dict) -> list[dict[str, str]]:
+    """Describe each archive for the UI; ``url`` is relative to the backend's api_url."""
+    return [
+        {
+            "browser": target,
+            "digest": artifact.digest,
+            "url": f"downloads/{artifact.digest}/{artifact.path.name}",
+        }
+        for target, artifact in artifacts.items()
+    ]
+
+
+def _adopt_prebuild(client_token: str, downloads: list[dict[str, str]]):
+    """Move the pre-built artifacts' references from the pre-build to the session."""
+    store = _artifact_store()
+    for download in downloads:
+        store.get(download["digest"], variant_session(client_token, download["browser"]))
+    release_variants(store, client_token, keep=tuple(d["browser"] for d in downloads))
+    release_variants(store, f"{client_token}:prebuild")
+
+
+def _release_if_disconnected(client_token: str, session: str):
+    if not _client_connected(client_token):
+        release_variants(_artifact_store(), session)
+
+
+def _record_wasted_prebuild(seconds: float):
+    METRICS.inc("prebuild_wasted_total")
+    METRICS.inc("prebuild_wasted_seconds_total", seconds)
+
+
+async def _save_transcript(client_token: str, start: int, messages: list[dict]):
+    if not messages:
+        return
+    try:
+        await asyncio.to_thread(TRANSCRIPTS.append, client_token, start, messages)
+    except Exception as e:
+        logging.exception(f"Failed to save transcript: {e}")
+        METRICS.inc("failures_total", path="transcripts", error=type(e).__name__)
 
-try:
-    import google.generativeai as genai
-except ImportError as e:
-    logging.exception(f"Failed to import google.generativeai: {e}")
-    genai = None
+
+async def _fetch_generate_content_models(api_key: str, model: str) -> list[str]:
+    with METRICS.span("list_models", "fetch"):
+        async with CLIENT_POOL.client(api_key, model) as client:
+            return await client.list_models()
 
 
 class ChatMessage(TypedDict):
@@ -38,11 +128,14 @@ INITIAL_CHAT_MESSAGE = [
 
 class ChatState(rx.State):
     chat_history: list[ChatMessage] = INITIAL_CHAT_MESSAGE
+    history_offset: int = 0
+    streaming_reply: str = ""
+    _persisted_messages: int = 0
     current_message: str = ""
     is_processing: bool = False
     api_key: str = rx.LocalStorage("")
-    available_models: list[str] = ["gemini-1.5-flash"]
-    selected_model: str = "gemini-1.5-flash"
+    available_models: list[str] = [DEFAULT_MODEL]
+    selected_model: str = DEFAULT_MODEL
     requirements: Requirements = {
         "name": "",
         "description": "",
@@ -52,8 +145,20 @@ class ChatState(rx.State):
         "has_popup": False,
         "has_options_page": False,
     }
+    _history_summary: str = ""
+    _summarized_messages: int = 0
+    _pending_field: str = ""
     generation_complete: bool = False
-    zip_path: str = ""
+    generation_status: str = ""
+    queue_position: int = 0
+    llm_status: str = ""
+    llm_queue_position: int = 0
+    llm_wait_seconds: int = 0
+    downloads: list[dict[str, str]] = []
+    _prebuild_requirements: dict = {}
+    _prebuild_model: str = ""
+    _prebuild_downloads: list[dict[str, str]] = []
+    _prebuild_seconds: float = 0.0
     show_error_toast: bool = False
     error_message: str = ""
 
@@ -61,6 +166,17 @@ class ChatState(rx.State):
     def show_api_key_modal(self) -> bool:
         return self.api_key == ""
 
+    @rx.var
+    def llm_status_message(self) -> str:
+        if self.llm_status == "queued":
+            return (
+                f"Waiting for the AI service (#{self.llm_queue_position}, "
+                f"about {self.llm_wait_seconds}s)..."
+            )
+        if self.llm_status == "retrying":
+            return f"The AI service is busy, retrying in {self.llm_wait_seconds}s..."
+        return ""
+
     @rx.event
     def save_api_key(self, form_data: dict[str, str]):
         key = form_data.get("api_key", "").strip()
@@ -75,36 +191,60 @@ class ChatState(rx.State):
         async with self:
             if not self.api_key:
                 return
+            api_key = self.api_key
+            # The session key is a Gemini key and the cache is keyed by it, so
+            # always list through Gemini, even while a Claude model is selected.
+            model_name = self.selected_model
+            if split_model(model_name)[0] != "gemini":
+                model_name = DEFAULT_MODEL
         try:
-            if not genai:
-                raise ImportError("google.generativeai not installed.")
-            genai.configure(api_key=self.api_key)
-            models = await asyncio.to_thread(genai.list_models)
-            model_names = []
-            for m in models:
-                if "generateContent" in m.supported_generation_methods:
-                    model_id = m.name.replace("models/", "")
-                    model_names.append(model_id)
-            async with self:
-                self.available_models = sorted(model_names)
-                if self.selected_model not in self.available_models:
-                    if "gemini-1.5-flash" in self.available_models:
-                        self.selected_model = "gemini-1.5-flash"
-                    elif self.available_models:
-                        self.selected_model = self.available_models[0]
-                    else:
-                        self.selected_model = ""
+            model_names = await MODEL_LIST_CACHE.get(
+                api_key,
+                functools.partial(_fetch_generate_content_models, api_key, model_name),
+            )
+            with METRICS.span("list_models", "state_update"):
+                async with self:
+                    self.available_models = sorted(model_names)
+                    if (
+                        split_model(self.selected_model)[0] == "gemini"
+                        and self.selected_model not in self.available_models
+                    ):
+                        if DEFAULT_MODEL in self.available_models:
+                            self.selected_model = DEFAULT_MODEL
+                        elif self.available_models:
+                            self.selected_model = self.available_models[0]
+                        else:
+                            self.selected_model = ""
         except Exception as e:
             logging.exception(f"Could not list models: {e}")
+            METRICS.inc("failures_total", path="list_models", error=type(e).__name__)
             async with self:
                 self.error_message = f"Could not fetch Gemini models. Using defaults."
                 self.show_error_toast = True
-                self.available_models = ["gemini-1.5-flash", "gemini-1.5-pro"]
+                self.available_models = [DEFAULT_MODEL, "gemini-1.5-pro"]
                 if self.selected_model not in self.available_models:
-                    self.selected_model = "gemini-1.5-flash"
+                    self.selected_model = DEFAULT_MODEL
 
     def _get_system_prompt(self) -> str:
-        return f"""\nYou are an expert in creating browser extensions. Your goal is to help a user define the requirements for a browser extension through a conversation.\nThe user will talk to you, and you need to ask questions to fill out the following requirements structure.\nWhen you have a value for a field, add it. Do not ask for it again.\nOnce all requirements are gathered, tell the user they can generate the extension.\n\nCurrent requirements:\n{json.dumps(self.requirements, indent=2)}\n\nYour response MUST be a valid JSON object with two keys:\n1. "response": A friendly, conversational reply to the user.\n2. "requirements": The updated requirements JSON object. If you don't have new information for a field, keep the existing value.\n\nThe requirements structure is:\n{{\n    "name": "string",\n    "description": "string",\n    "target_browser": ["Chrome" | "Firefox"],\n    "inject_urls": ["url_pattern"],\n    "has_background_script": boolean,\n    "has_popup": boolean,\n    "has_options_page": boolean\n}}\n\nKeep your conversational response concise.\nAsk one question at a time.\nStart by asking for the extension name.\n"""
+        return f"""\nYou are an expert in creating browser extensions. Your goal is to help a user define the requirements for a browser extension through a conversation.\nThe user will talk to you, and you need to ask questions to fill out the following requirements structure.\nWhen you have a value for a field, add it. Do not ask for it again.\nOnce all requirements are gathered, tell the user they can generate the extension.\n\nCurrent requirements:\n{json.dumps(self.requirements, indent=2)}\n\nYour response MUST be a valid JSON object with two keys:\n1. "response": A friendly, conversational reply to the user.\n2. "requirements": The requirements fields you have new values for. Omit fields that did not change.\n\nThe requirements structure is:\n{{\n    "name": "string",\n    "description": "string",\n    "target_browser": ["Chrome" | "Firefox"],\n    "inject_urls": ["url_pattern"],\n    "has_background_script": boolean,\n    "has_popup": boolean,\n    "has_options_page": boolean\n}}\n\nKeep your conversational response concise.\nAsk one question at a time.\nStart by asking for the extension name.\n"""
+
+    async def _stream_reply(self, api_key: str, model: str, window: PromptWindow) -> dict:
+        throttle = Throttle(STREAM_PUSH_INTERVAL)
+
+        async def push(text: str):
+            if throttle.ready():
+                async with self:
+                    self.streaming_reply = text
+
+        return await LLM_ROUTER.stream_message(
+            api_key,
+            model,
+            window.history,
+            window.message,
+            window.system_instruction,
+            REPLY_SCHEMA,
+            on_text=push,
+        )
 
     @rx.event(background=True)
     async def process_message(self, form_data: dict[str, str]):
@@ -119,156 +259,316 @@ class ChatState(rx.State):
                 self.error_message = "Please set your Gemini API key first."
                 self.show_error_toast = True
                 return
-            self.is_processing = True
             self.chat_history.append({"role": "user", "content": message})
-        try:
-            if not genai:
-                raise ImportError(
-                    "google.generativeai not installed. Run `pip install google-generativeai`"
-                )
-            genai.configure(api_key=self.api_key)
-            model = genai.GenerativeModel(self.selected_model)
-            prompt_history = []
-            for msg in self.chat_history:
-                role = "model" if msg["role"] == "assistant" else msg["role"]
-                prompt_history.append(
-                    {"role": role, "parts": [{"text": msg["content"]}]}
+            with METRICS.span("process_message", "fast_path"):
+                fast_answer = extract_answer(
+                    message, copy.deepcopy(self.requirements), self._pending_field
                 )
-            conversation = model.start_chat(history=prompt_history[:-1])
-            system_prompt = self._get_system_prompt()
-            user_message = prompt_history[-1]["parts"][0]["text"]
-            response = await conversation.send_message_async(
-                f"{system_prompt}\n\nUser input: {user_message}"
+            client_token = self.router.session.client_token
+            fast_path_hit = (
+                fast_answer is not None
+                and fast_answer.confidence >= FAST_PATH_MIN_CONFIDENCE
             )
-            response_text = response.text.strip()
-            json_start = response_text.find("{")
-            json_end = response_text.rfind("}") + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("AI response did not contain a valid JSON object.")
-            json_str = response_text[json_start:json_end]
-            parsed_response = json.loads(json_str)
-            ai_message = parsed_response.get(
-                "response", "I'm not sure how to respond to that. Could you try again?"
+            if fast_path_hit:
+                METRICS.inc("fast_path_total", outcome="hit")
+                self.chat_history.append(
+                    {"role": "assistant", "content": fast_answer.reply}
+                )
+                self.requirements = fast_answer.requirements
+                self._pending_field = fast_answer.next_field
+                self.current_message = ""
+                unsaved = self._take_unsaved_messages()
+            else:
+                METRICS.inc("fast_path_total", outcome="miss")
+                self.is_processing = True
+                api_key = self.api_key
+                model_name = self.selected_model
+        if fast_path_hit:
+            await _save_transcript(client_token, *unsaved)
+            return ChatState.prebuild_extension
+        try:
+            async with self:
+                with METRICS.span("process_message", "prompt_build"):
+                    window = CONTEXT_WINDOW.build(
+                        self._get_system_prompt(),
+                        self.chat_history,
+                        self._history_summary,
+                        max(0, self._summarized_messages - self.history_offset),
+                    )
+                self._history_summary = window.summary
+                self._summarized_messages = window.summarized_count + self.history_offset
+            logging.info(
+                f"Prompt tokens: {window.prompt_tokens} "
+                f"(full history would be {window.full_prompt_tokens})"
             )
-            updated_requirements = parsed_response.get(
-                "requirements", self.requirements
+            METRICS.observe("prompt_tokens", window.prompt_tokens)
+            METRICS.inc(
+                "prompt_tokens_saved_total",
+                window.full_prompt_tokens - window.prompt_tokens,
             )
-            async with self:
-                self.chat_history.append({"role": "assistant", "content": ai_message})
-                self.requirements = updated_requirements
-                self.is_processing = False
+            if STREAM_RESPONSES:
+
+                async def call() -> dict:
+                    return await self._stream_reply(api_key, model_name, window)
+            else:
+
+                async def call() -> dict:
+                    return await LLM_ROUTER.send_message(
+                        api_key,
+                        model_name,
+                        window.history,
+                        window.message,
+                        window.system_instruction,
+                        REPLY_SCHEMA,
+                    )
+
+            with METRICS.span("process_message", "llm_call"):
+                async for update in LLM_SCHEDULER.submit(api_key, client_token, call):
+                    if update.status == "done":
+                        parsed_response = update.result
+                    else:
+                        async with self:
+                            self.llm_status = update.status
+                            self.llm_queue_position = update.position
+                            self.llm_wait_seconds = round(update.wait)
+            ai_message = parsed_response["response"]
+            with METRICS.span("process_message", "state_update"):
+                async with self:
+                    self.chat_history.append({"role": "assistant", "content": ai_message})
+                    self.streaming_reply = ""
+                    self.requirements = merge_requirements(
+                        copy.deepcopy(self.requirements),
+                        parsed_response.get("requirements"),
+                    )
+                    self._pending_field = infer_pending_field(ai_message)
+                    self.llm_status = ""
+                    self.is_processing = False
         except Exception as e:
             logging.exception(f"Error processing AI message: {e}")
+            METRICS.inc("failures_total", path="process_message", error=type(e).__name__)
             async with self:
                 error_str = f"Sorry, there was an error with the AI service: {e}"
                 self.error_message = error_str
                 self.chat_history.append({"role": "assistant", "content": error_str})
+                self.streaming_reply = ""
                 self.show_error_toast = True
+                self.llm_status = ""
                 self.is_processing = False
         async with self:
             self.current_message = ""
+            unsaved = self._take_unsaved_messages()
+        await _save_transcript(client_token, *unsaved)
+        return ChatState.prebuild_extension
+
+    def _take_unsaved_messages(self) -> tuple[int, list[dict]]:
+        """Return finished messages not yet in the transcript store and trim the tail.
+
+        Only messages that are saved and already folded into the prompt
+        summary leave live state; ``load_older`` pages them back in.
+        """
+        start = self._persisted_messages
+        unsaved = [dict(m) for m in self.chat_history[start - self.history_offset :]]
+        self._persisted_messages = self.history_offset + len(self.chat_history)
+        drop = min(
+            len(self.chat_history) - HISTORY_TAIL,
+            self._summarized_messages - self.history_offset,
+        )
+        if drop > 0:
+            self.chat_history = self.chat_history[drop:]
+            self.history_offset += drop
+        return start, unsaved
+
+    @rx.event
+    async def load_older(self):
+        start = max(0, self.history_offset - HISTORY_PAGE)
+        older = await asyncio.to_thread(
+            TRANSCRIPTS.load, self.router.session.client_token, start, self.history_offset
+        )
+        if len(older) != self.history_offset - start:
+            logging.warning("Transcript store is missing earlier messages.")
+            return
+        self.chat_history = older + list(self.chat_history)
+        self.history_offset = start
+
+    def _discard_prebuild(self):
+        prebuild = f"{self.router.session.client_token}:prebuild"
+        PACKAGING_EXECUTOR.cancel(prebuild)
+        release_variants(_artifact_store(), prebuild)
+        if self._prebuild_downloads:
+            _record_wasted_prebuild(self._prebuild_seconds)
+        self._prebuild_requirements = {}
+        self._prebuild_downloads = []
+
+    @rx.event(background=True)
+    async def prebuild_extension(self):
+        """Package the current requirements ahead of an expected Generate click.
+
+        Runs only when the packaging pool is idle so real builds never wait
+        behind it; a newer set of requirements cancels and replaces it.
+
+        It never calls the LLM, so it only runs once the code for every
+        enabled asset is in the snippet cache. A description that has not
+        been generated before is never pre-built; that case is counted as
+        ``prebuild_total{outcome="uncached"}``.
+        """
+        async with self:
+            requirements = copy.deepcopy(self.requirements)
+            model = self.selected_model
+            if not requirements["name"] or not requirements["description"]:
+                return
+            if requirements == self._prebuild_requirements and model == self._prebuild_model:
+                return
+            self._discard_prebuild()
+            if not PACKAGING_EXECUTOR.idle:
+                METRICS.inc("prebuild_total", outcome="skipped")
+                return
+            client_token = self.router.session.client_token
+        assets = await ASSET_GENERATOR.cached(model, requirements, create_manifest(requirements))
+        if assets is None:
+            METRICS.inc("prebuild_total", outcome="uncached")
+            return
+        async with self:
+            if self.requirements != requirements or self.selected_model != model:
+                return
+            if requirements == self._prebuild_requirements and model == self._prebuild_model:
+                return
+            self._prebuild_requirements = requirements
+            self._prebuild_model = model
+        METRICS.inc("prebuild_total", outcome="started")
+        started = None
+        try:
+            async for update in PACKAGING_EXECUTOR.submit(
+                package_extension,
+                requirements,
+                _artifact_store(),
+                f"{client_token}:prebuild",
+                COMPRESSION_LEVEL,
+                assets,
+                owner=f"{client_token}:prebuild",
+                is_alive=functools.partial(_client_connected, client_token),
+            ):
+                if update.status == "building":
+                    started = time.perf_counter()
+                elif update.status == "done":
+                    METRICS.inc("prebuild_total", outcome="completed")
+                    seconds = time.perf_counter() - started
+                    async with self:
+                        if self._prebuild_requirements == requirements:
+                            self._prebuild_downloads = _downloads(update.result)
+                            self._prebuild_seconds = seconds
+                        else:
+                            _record_wasted_prebuild(seconds)
+                            if not self._prebuild_requirements:
+                                release_variants(
+                                    _artifact_store(), f"{client_token}:prebuild"
+                                )
+        except PackagingCancelled:
+            METRICS.inc("prebuild_total", outcome="cancelled")
+            _release_if_disconnected(client_token, f"{client_token}:prebuild")
+            if started is not None:
+                _record_wasted_prebuild(time.perf_counter() - started)
+        except Exception as e:
+            logging.exception(f"Pre-build failed: {e}")
+            METRICS.inc(
+                "failures_total", path="prebuild_extension", error=type(e).__name__
+            )
 
     @rx.event(background=True)
     async def generate_extension(self):
+        prebuilt = []
         async with self:
             if not self.requirements["name"] or not self.requirements["description"]:
                 self.error_message = "Extension name and description are required."
                 self.show_error_toast = True
                 return
-            self.is_processing = True
-            self.generation_complete = False
-            self.zip_path = ""
-        await asyncio.sleep(2)
+            client_token = self.router.session.client_token
+            if (
+                self._prebuild_downloads
+                and self.requirements == self._prebuild_requirements
+                and self.selected_model == self._prebuild_model
+            ):
+                METRICS.inc("prebuild_generate_total", outcome="hit")
+                prebuilt = self._prebuild_downloads
+                self.downloads = prebuilt
+                self._prebuild_downloads = []
+                self.generation_status = "done"
+                self.generation_complete = True
+            else:
+                METRICS.inc("prebuild_generate_total", outcome="miss")
+                self.is_processing = True
+                self.generation_complete = False
+                self.downloads = []
+                self.generation_status = "writing_code"
+                requirements = copy.deepcopy(self.requirements)
+                manifest = self._create_manifest()
+                api_key = self.api_key
+                model = self.selected_model
+        if prebuilt:
+            await asyncio.to_thread(_adopt_prebuild, client_token, prebuilt)
+            return
         try:
-            upload_dir = rx.get_upload_dir()
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            dir_name = "".join(filter(str.isalnum, self.requirements["name"])).lower()
-            if not dir_name:
-                dir_name = "my_extension"
-            ext_dir = upload_dir / dir_name
-            if ext_dir.exists():
-                import shutil
-
-                shutil.rmtree(ext_dir)
-            ext_dir.mkdir(exist_ok=True)
-            manifest = self._create_manifest()
-            with open(ext_dir / "manifest.json", "w") as f:
-                json.dump(manifest, f, indent=2)
-            if manifest.get("content_scripts"):
-                content_script = """// Content script for your extension
-
-console.log('Content script loaded!');"""
-                with open(ext_dir / "content.js", "w") as f:
-                    f.write(content_script)
-            if manifest.get("background"):
-                background_script = """// Background script for your extension
-
-console.log('Background script loaded!');"""
-                with open(ext_dir / "background.js", "w") as f:
-                    f.write(background_script)
-            if manifest.get("action"):
-                popup_html = "<html><head><title>Popup</title><link rel='stylesheet' href='popup.css'></head><body><h1>Extension Popup</h1><script src='popup.js'></script></body></html>"
-                popup_js = "console.log('Popup script loaded!');"
-                popup_css = "body { width: 200px; font-family: sans-serif; text-align: center; }"
-                with open(ext_dir / "popup.html", "w") as f:
-                    f.write(popup_html)
-                with open(ext_dir / "popup.js", "w") as f:
-                    f.write(popup_js)
-                with open(ext_dir / "popup.css", "w") as f:
-                    f.write(popup_css)
-            if manifest.get("options_ui"):
-                options_html = "<html><head><title>Options</title><link rel='stylesheet' href='options.css'></head><body><h1>Extension Options</h1><script src='options.js'></script></body></html>"
-                options_js = "console.log('Options script loaded!');"
-                options_css = "body { width: 400px; font-family: sans-serif; }"
-                with open(ext_dir / "options.html", "w") as f:
-                    f.write(options_html)
-                with open(ext_dir / "options.js", "w") as f:
-                    f.write(options_js)
-                with open(ext_dir / "options.css", "w") as f:
-                    f.write(options_css)
-            zip_filename = f"{dir_name}.zip"
-            zip_filepath = upload_dir / zip_filename
-            with zipfile.ZipFile(zip_filepath, "w") as zipf:
-                for root, _, files in os.walk(ext_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, ext_dir)
-                        zipf.write(file_path, arcname)
+            assets, failed = await ASSET_GENERATOR.generate(
+                api_key, model, f"{client_token}:codegen", requirements, manifest
+            )
+            if failed:
+                async with self:
+                    self.error_message = (
+                        f"Could not generate code for: {', '.join(failed)}. "
+                        "Those files are placeholders."
+                    )
+                    self.show_error_toast = True
+            async for update in PACKAGING_EXECUTOR.submit(
+                package_extension,
+                requirements,
+                _artifact_store(),
+                client_token,
+                COMPRESSION_LEVEL,
+                assets,
+                owner=client_token,
+                is_alive=functools.partial(_client_connected, client_token),
+            ):
+                async with self:
+                    self.generation_status = update.status
+                    self.queue_position = update.position
+                    if update.status == "done":
+                        self.downloads = _downloads(update.result)
+                        self.generation_complete = True
+                        self.is_processing = False
+        except PackagingCancelled:
+            logging.info("Extension generation was cancelled.")
+            _release_if_disconnected(client_token, client_token)
             async with self:
-                self.zip_path = zip_filename
-                self.generation_complete = True
+                self.generation_status = ""
+                self.is_processing = False
+        except PackagingQueueFull as e:
+            async with self:
+                self.error_message = str(e)
+                self.show_error_toast = True
+                self.generation_status = ""
+                self.is_processing = False
+        except PackagingTimeout as e:
+            logging.warning(f"Generation timed out: {e}")
+            METRICS.inc(
+                "failures_total", path="generate_extension", error=type(e).__name__
+            )
+            async with self:
+                self.error_message = str(e)
+                self.show_error_toast = True
+                self.generation_status = ""
                 self.is_processing = False
         except Exception as e:
             logging.exception(f"Generation failed: {e}")
+            METRICS.inc(
+                "failures_total", path="generate_extension", error=type(e).__name__
+            )
             async with self:
                 self.error_message = f"Generation failed: {e}"
                 self.show_error_toast = True
+                self.generation_status = ""
                 self.is_processing = False
 
     def _create_manifest(self) -> dict:
-        manifest = {
-            "manifest_version": 3,
-            "name": self.requirements["name"],
-            "version": "1.0",
-            "description": self.requirements["description"],
-        }
-        if self.requirements.get("has_background_script"):
-            manifest["background"] = {"service_worker": "background.js"}
-        if self.requirements.get("inject_urls"):
-            manifest["content_scripts"] = [
-                {"matches": self.requirements["inject_urls"], "js": ["content.js"]}
-            ]
-        if self.requirements.get("has_popup"):
-            manifest["action"] = {"default_popup": "popup.html"}
-        if self.requirements.get("has_options_page"):
-            manifest["options_ui"] = {"page": "options.html", "open_in_tab": True}
-        if "Firefox" in self.requirements.get("target_browser", []):
-            manifest["browser_specific_settings"] = {
-                "gecko": {
-                    "id": f"{self.requirements['name'].lower().replace(' ', '-')}@example.com"
-                }
-            }
-        return manifest
+        return create_manifest(self.requirements)
 
     @rx.event
     def trigger_error_toast(self):
@@ -0,0 +1,99 @@
+"""State-delta size and mounted chat bubbles as a conversation grows.
+
+For each ``--lengths`` value a ChatState is seeded with that many earlier
+messages and one streamed turn is run against FakeLLMClient. Every time the
+handler releases the state, the delta Reflex would send to the browser is
+serialized and measured. ``mounted_bubbles`` is how many message bubbles
+the chat view holds after the turn; the old view remounted all of them on
+every message.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+
+os.environ.setdefault("REFLEX_UPLOADED_FILES_DIR", tempfile.mkdtemp(prefix="render-bench-"))
+os.environ.setdefault("TRANSCRIPT_DB_PATH", os.path.join(tempfile.mkdtemp(), "transcripts.sqlite3"))
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+
+from reflex.utils.format import json_dumps  # noqa: E402
+
+import app.states.chat_state as chat_state  # noqa: E402
+from app.services.fake_llm import FakeLLMClient  # noqa: E402
+from app.services.llm import CLIENT_POOL  # noqa: E402
+from benchmarks.bench_load import LockStats, SimulatedSession, call, new_state  # noqa: E402
+
+
+class DeltaSession(SimulatedSession):
+    """Record the serialized size of the state delta each time the lock is released."""
+
+    def __init__(self, state):
+        super().__init__(state, LockStats())
+        object.__setattr__(self, "deltas", [])
+
+    async def __aexit__(self, *exc):
+        self.deltas.append(len(json_dumps(flush_delta(self._state))))
+        self._lock.release()
+
+
+def flush_delta(state) -> dict:
+    root = state
+    while root.parent_state is not None:
+        root = root.parent_state
+    delta = root.get_delta()
+    root._clean()
+    return delta
+
+
+def seed_history(state, length: int):
+    state.chat_history = [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message {i}: the popup should list every open tab with its title.",
+        }
+        for i in range(length)
+    ]
+    # As if earlier turns had already been saved and summarized.
+    state._persisted_messages = length
+    state._summarized_messages = max(0, length - 10)
+
+
+async def measure(length: int) -> dict:
+    state = new_state(length)
+    seed_history(state, length)
+    flush_delta(state)
+    session = DeltaSession(state)
+    await call("process_message", session, {"message": "Make it work offline too, please"})
+    deltas = session.deltas
+    return {
+        "messages": length,
+        "releases": len(deltas),
+        "median_delta_bytes": statistics.median(deltas),
+        "max_delta_bytes": max(deltas),
+        "mounted_bubbles": len(state.chat_history),
+        "remounted_bubbles_before": length + 2,
+    }
+
+
+async def run(args) -> list[dict]:
+    chat_state.STREAM_RESPONSES = True
+    chat_state.STREAM_PUSH_INTERVAL = 0
+    CLIENT_POOL.factory = lambda api_key, model: FakeLLMClient(
+        api_key, model, latency=args.latency, jitter=0, chunk_size=8
+    )
+    return [await measure(length) for length in args.lengths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[25, 50, 100, 200, 400, 800])
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds.")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Concurrent archive downloads through the /downloads route, driven over ASGI directly.
+
+Reports throughput, latency percentiles and the peak Python heap while
+``--clients`` downloads of one ``--size-mb`` archive run at once. Half of
+the clients resume with a Range request. After the first client's first
+chunk, the archive is replaced on disk the way an overwriting rebuild
+would; that transfer must still hash to the original bytes.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import app.api
+from app.services.artifacts import ArtifactStore
+from benchmarks.common import summarize
+
+DIGEST = "d" * 64
+FILENAME = "bench-chrome.zip"
+
+
+async def fetch(headers: dict[str, str], replace_after_first_chunk=None) -> tuple[int, bytes, float]:
+    """Run one GET through the ASGI app; returns status, body digest and seconds."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/downloads/{DIGEST}/{FILENAME}",
+        "raw_path": f"/downloads/{DIGEST}/{FILENAME}".encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    sha256 = hashlib.sha256()
+    status = 0
+    chunks = 0
+
+    requested = False
+    never = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            await never.wait()  # The client never disconnects.
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, chunks
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            sha256.update(message.get("body", b""))
+            chunks += 1
+            if chunks == 1 and replace_after_first_chunk:
+                replace_after_first_chunk()
+
+    start = time.perf_counter()
+    await app.api.api(scope, receive, send)
+    return status, sha256.digest(), time.perf_counter() - start
+
+
+async def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        app.api.ARTIFACTS_DIR = Path(tmp) / "artifacts"
+        data = os.urandom(args.size_mb * 1024 * 1024)
+        store = ArtifactStore(app.api.ARTIFACTS_DIR)
+        artifact = store.put(DIGEST, FILENAME, data, hashlib.sha256(data).hexdigest())
+        offset = len(data) // 2
+        expected_sha256 = hashlib.sha256(data).digest()
+
+        replacement = artifact.path.with_name(".rebuild")
+        replacement.write_bytes(os.urandom(len(data)))
+
+        def rebuild():
+            os.replace(replacement, artifact.path)
+
+        requests = [
+            ("range", {"Range": f"bytes={offset}-"}) if i % 2 else ("full", {})
+            for i in range(args.clients)
+        ]
+        tracemalloc.start()
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                fetch(headers, rebuild if i == 0 else None)
+                for i, (_, headers) in enumerate(requests)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    # The first client was mid-transfer when the file was replaced.
+    intact = results[0][:2] == (200, expected_sha256)
+    served = sum(len(data) - (offset if kind == "range" else 0) for kind, _ in requests)
+    return {
+        "clients": args.clients,
+        "size_mb": args.size_mb,
+        "statuses": sorted({status for status, _, _ in results}),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_mb_s": round(served / elapsed / 1e6, 1),
+        "latency": summarize([seconds for _, _, seconds in results]),
+        "peak_heap_mb": round(peak / 1e6, 2),
+        "rebuild_during_transfer_intact": intact,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--size-mb", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from app.services.fast_path import extract_answer, infer_pending_field
+
+CONVERSATIONS = Path(__file__).with_name("conversations.jsonl")
+EMPTY_REQUIREMENTS = {
+    "name": "",
+    "description": "",
+    "target_browser": [],
+    "inject_urls": [],
+    "has_background_script": False,
+    "has_popup": False,
+    "has_options_page": False,
+}
+
+
+def replay(path: Path, llm_latency: float, min_confidence: float) -> dict:
+    baseline, fast = [], []
+    llm_calls = 0
+    for line in path.read_text().splitlines():
+        requirements = dict(EMPTY_REQUIREMENTS)
+        for turn in json.loads(line)["turns"]:
+            baseline.append(llm_latency)
+            start = time.perf_counter()
+            answer = extract_answer(
+                turn["user"], requirements, infer_pending_field(turn["assistant"])
+            )
+            elapsed = time.perf_counter() - start
+            if answer and answer.confidence >= min_confidence:
+                requirements = answer.requirements
+                fast.append(elapsed)
+            else:
+                llm_calls += 1
+                fast.append(elapsed + llm_latency)
+    return {
+        "turns": len(baseline),
+        "llm_calls_baseline": len(baseline),
+        "llm_calls_fast_path": llm_calls,
+        "median_turn_ms_baseline": statistics.median(baseline) * 1000,
+        "median_turn_ms_fast_path": statistics.median(fast) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded conversations through the fast path.")
+    parser.add_argument("--conversations", type=Path, default=CONVERSATIONS)
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Simulated seconds per LLM call.")
+    parser.add_argument("--min-confidence", type=float, default=0.9)
+    args = parser.parse_args()
+    result = replay(args.conversations, args.llm_latency, args.min_confidence)
+    saved = result["llm_calls_baseline"] - result["llm_calls_fast_path"]
+    print(json.dumps(result, indent=2))
+    print(f"LLM calls saved: {saved}/{result['turns']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Concurrent-session load test for the ChatState event handlers.
+
+Runs ``list_models``, several ``process_message`` turns and
+``generate_extension`` for many simulated sessions against FakeLLMClient,
+then writes a JSON report. Pass ``--baseline`` with an earlier report to
+print the difference between runs.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import time
+import types
+from pathlib import Path
+
+os.environ.setdefault("REFLEX_UPLOADED_FILES_DIR", tempfile.mkdtemp(prefix="load-test-"))
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+
+import reflex as rx  # noqa: E402
+from reflex.constants import RouteVar  # noqa: E402
+from reflex.istate.data import RouterData  # noqa: E402
+
+from app.services.fake_llm import FakeLLMClient  # noqa: E402
+from app.services.llm import CLIENT_POOL  # noqa: E402
+from app.services.model_cache import MODEL_LIST_CACHE  # noqa: E402
+from app.states.chat_state import ChatState  # noqa: E402
+from benchmarks.common import measure_loop_lag, summarize  # noqa: E402
+
+RESULTS_DIR = Path(__file__).with_name("results")
+MESSAGES = [
+    "I want an extension that saves all my open tabs into named sessions",
+    "It should also let me restore a session with one click",
+    "Maybe it could sync sessions between my laptop and desktop",
+    "Call it Tab Saver and make the icon orange",
+]
+
+
+class LockStats:
+    def __init__(self):
+        self.waits: list[float] = []
+        self.holds: list[float] = []
+
+
+class SimulatedSession:
+    """Drive a real ChatState instance the way Reflex drives background tasks.
+
+    ``async with session`` takes a per-session lock like Reflex's StateProxy
+    and records how long it waited for and held it.
+    """
+
+    def __init__(self, state: ChatState, stats: LockStats):
+        object.__setattr__(self, "_state", state)
+        object.__setattr__(self, "_stats", stats)
+        object.__setattr__(self, "_lock", asyncio.Lock())
+        object.__setattr__(self, "_acquired_at", 0.0)
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        await self._lock.acquire()
+        object.__setattr__(self, "_acquired_at", time.perf_counter())
+        self._stats.waits.append(self._acquired_at - start)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._stats.holds.append(time.perf_counter() - self._acquired_at)
+        self._lock.release()
+
+    def __getattr__(self, name):
+        value = getattr(self._state, name)
+        if isinstance(value, types.MethodType) and value.__self__ is self._state:
+            return types.MethodType(value.__func__, self)
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self._state, name, value)
+
+
+def new_state(index: int) -> ChatState:
+    root = rx.State(_reflex_internal_init=True)
+    # Each session gets its own client token, as Reflex assigns on connect,
+    # so transcripts, scheduler fairness and pre-builds are per session.
+    root.router_data = {RouteVar.CLIENT_TOKEN: f"load-test-{index}"}
+    root.router = RouterData.from_router_data(root.router_data)
+    state = root.get_substate(ChatState.get_full_name().split("."))
+    state.api_key = f"load-test-key-{index}"
+    return state
+
+
+async def call(handler: str, session: SimulatedSession, *args):
+    result = ChatState.event_handlers[handler].fn(session, *args)
+    if hasattr(result, "__aiter__"):
+        async for _ in result:
+            pass
+    elif asyncio.iscoroutine(result):
+        await result
+
+
+async def run_session(index: int, turns: int, stats: LockStats, timings: dict):
+    session = SimulatedSession(new_state(index), stats)
+    for handler, args in [
+        ("list_models", ()),
+        *[("process_message", ({"message": MESSAGES[t % len(MESSAGES)]},)) for t in range(turns)],
+        ("generate_extension", ()),
+    ]:
+        start = time.perf_counter()
+        await call(handler, session, *args)
+        timings.setdefault(handler, []).append(time.perf_counter() - start)
+
+
+async def run(args) -> dict:
+    CLIENT_POOL.factory = lambda api_key, model: FakeLLMClient(
+        api_key, model, latency=args.latency, jitter=args.jitter
+    )
+    MODEL_LIST_CACHE.ttl = 0 if args.no_model_cache else MODEL_LIST_CACHE.ttl
+    stats = LockStats()
+    timings: dict[str, list[float]] = {}
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_lag(stop, 0.005, lags))
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(index: int):
+        async with semaphore:
+            await run_session(index, args.turns, stats, timings)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    turns = timings.get("process_message", [])
+    return {
+        "commit": _git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "elapsed_s": elapsed,
+        "throughput_turns_per_s": len(turns) / elapsed if elapsed else 0.0,
+        "handlers": {name: summarize(values) for name, values in timings.items()},
+        "event_loop_lag": summarize(lags),
+        "state_lock_wait": summarize(stats.waits),
+        "state_lock_hold": summarize(stats.holds),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(report: dict, baseline: dict):
+    for name, summary in report["handlers"].items():
+        before = baseline.get("handlers", {}).get(name)
+        if before:
+            delta = summary["p95_ms"] - before["p95_ms"]
+            print(f"{name:>20} p95: {before['p95_ms']:.1f} -> {summary['p95_ms']:.1f} ms ({delta:+.1f})")
+    print(
+        f"{'throughput':>20}: {baseline['throughput_turns_per_s']:.1f} -> "
+        f"{report['throughput_turns_per_s']:.1f} turns/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake LLM latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake LLM latency jitter in seconds.")
+    parser.add_argument("--no-model-cache", action="store_true", help="Expire cached model lists immediately.")
+    parser.add_argument("--output", type=Path, help="Defaults to benchmarks/results/load_test-<commit>.json.")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against.")
+    args = parser.parse_args()
+    report = asyncio.run(run(args))
+    if args.output is None:
+        args.output = RESULTS_DIR / f"load_test-{report['commit'] or 'local'}.json"
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(json.dumps({k: report[k] for k in ("elapsed_s", "throughput_turns_per_s", "handlers")}, indent=2))
+    print(f"Report written to {args.output}")
+    if args.baseline:
+        compare(report, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.artifacts import ArtifactStore
+from app.services.packaging import package_extension
+from benchmarks.common import measure_loop_lag
+
+REQUIREMENTS = {
+    "name": "Benchmark Extension",
+    "description": "Exercises every optional asset.",
+    "target_browser": ["Chrome", "Firefox"],
+    "inject_urls": ["<all_urls>"],
+    "has_background_script": True,
+    "has_popup": True,
+    "has_options_page": True,
+}
+
+
+async def run(iterations: int, offload: bool, reuse: bool = False) -> dict:
+    lags: list[float] = []
+    durations: list[float] = []
+    stop = asyncio.Event()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ArtifactStore(Path(tmp))
+        ticker = asyncio.create_task(measure_loop_lag(stop, 0.001, lags))
+        for i in range(iterations):
+            requirements = REQUIREMENTS
+            if not reuse:
+                requirements = {**REQUIREMENTS, "description": f"Build #{i}."}
+            start = time.perf_counter()
+            if offload:
+                await asyncio.to_thread(package_extension, requirements, store)
+            else:
+                package_extension(requirements, store)
+                await asyncio.sleep(0)
+            durations.append(time.perf_counter() - start)
+        stop.set()
+        await ticker
+    return {
+        "mode": ("to_thread" if offload else "inline") + (" (reuse)" if reuse else ""),
+        "iterations": iterations,
+        "median_ms": statistics.median(durations) * 1000,
+        "max_loop_lag_ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def run_matrix(iterations: int, targets: list[str], separately: bool = False) -> float:
+    """Median milliseconds to build every requested target from scratch.
+
+    ``separately`` packages each target in its own call, the way a build
+    without the shared matrix would. The matrix only skips re-rendering and
+    re-compressing the shared assets; each target still assembles and writes
+    its own archive, which dominates here, so two targets cost about the same
+    either way.
+    """
+    durations: list[float] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(iterations):
+            # A fresh store per build, so store bookkeeping does not grow
+            # with the iteration count.
+            store = ArtifactStore(Path(tmp) / str(i))
+            requirements = {
+                **REQUIREMENTS,
+                "description": f"Build #{i}.",
+                "target_browser": targets,
+            }
+            start = time.perf_counter()
+            if separately:
+                for target in targets:
+                    package_extension({**requirements, "target_browser": [target]}, store)
+            else:
+                package_extension(requirements, store)
+            durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extension packaging.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    for offload, reuse in ((False, False), (True, False), (True, True)):
+        result = asyncio.run(run(args.iterations, offload, reuse))
+        print(
+            f"{result['mode']:>17}: {result['median_ms']:.3f} ms/generation, "
+            f"max loop lag {result['max_loop_lag_ms']:.3f} ms"
+        )
+    for targets, separately in (
+        (["Chrome"], False),
+        (["Chrome", "Firefox"], True),
+        (["Chrome", "Firefox"], False),
+    ):
+        median_ms = run_matrix(args.iterations, targets, separately)
+        label = " + ".join(targets) + (" (separate)" if separately else "")
+        print(f"{label:>28}: {median_ms:.3f} ms/build")
+
+
+if __name__ == "__main__":
+    main()
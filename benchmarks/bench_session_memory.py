@@ -0,0 +1,69 @@
+"""Per-session memory: full chat history in state vs a bounded tail plus the transcript store.
+
+Simulates ``--sessions`` conversations of ``--messages`` messages and
+reports the Python heap held by live session state (tracemalloc) and the
+size of the serialized ``chat_history`` each state sync would carry.
+"""
+
+import argparse
+import json
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from app.services.transcripts import TranscriptStore
+
+
+def conversation(session: int, messages: int) -> list[dict]:
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Session {session}, message {i}: "
+            + "please make the popup list every open tab with its title. " * 6,
+        }
+        for i in range(messages)
+    ]
+
+
+def measure(sessions: int, messages: int, tail: int | None, store: TranscriptStore | None) -> dict:
+    tracemalloc.start()
+    live = {}
+    for session in range(sessions):
+        history = conversation(session, messages)
+        if store is not None:
+            store.append(str(session), 0, history)
+        live[session] = history[-tail:] if tail else history
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    state_bytes = sum(len(json.dumps(history)) for history in live.values())
+    return {
+        "heap_mb": round(current / 1e6, 2),
+        "heap_kb_per_session": round(current / 1e3 / sessions, 1),
+        "state_json_kb_per_session": round(state_bytes / 1e3 / sessions, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-session memory with and without the transcript store.")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--tail", type=int, default=40)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TranscriptStore(Path(tmp) / "transcripts.sqlite3")
+        report = {
+            "full_history": measure(args.sessions, args.messages, None, None),
+            "tail_plus_store": measure(args.sessions, args.messages, args.tail, store),
+            "store": {
+                **store.stats(),
+                "file_mb": round(
+                    sum(p.stat().st_size for p in Path(tmp).iterdir()) / 1e6, 2
+                ),
+            },
+        }
+        store.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
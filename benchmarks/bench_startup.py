@@ -0,0 +1,79 @@
+"""Cold-start benchmark: import time per module and time to first render.
+
+Every measurement runs in a fresh interpreter so nothing is already cached
+in ``sys.modules``. Pass ``--budget`` to exit non-zero when the time to
+first render exceeds it, e.g. as a check before rolling out autoscaled
+workers.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULES = [
+    "app.services.llm",
+    "app.states.chat_state",
+    "app.components.chat",
+    "app.components.summary",
+    "app.app",
+]
+SDKS = ["google.genai", "anthropic"]
+
+IMPORT_SNIPPET = """
+import importlib, time
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - start)
+"""
+
+# Interpreter start to the index page's component tree being rendered.
+RENDER_SNIPPET = """
+import time
+start = time.perf_counter()
+from app.app import index
+index().render()
+print(time.perf_counter() - start)
+"""
+
+
+def measure(snippet: str) -> float | None:
+    result = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def median_ms(snippet: str, repeat: int) -> float | None:
+    samples = [measure(snippet) for _ in range(repeat)]
+    if None in samples:
+        return None
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import and render time.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="Max ms to first render.")
+    args = parser.parse_args()
+    report = {
+        "imports_ms": {
+            module: median_ms(IMPORT_SNIPPET.format(module=module), args.repeat)
+            for module in [*MODULES, *SDKS]
+        },
+        "first_render_ms": median_ms(RENDER_SNIPPET, args.repeat),
+    }
+    print(json.dumps(report, indent=2))
+    first_render = report["first_render_ms"]
+    if args.budget is not None and (first_render is None or first_render > args.budget):
+        print(f"Time to first render exceeds the {args.budget:.0f} ms budget.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import io
+import json
+import os
+import zipfile
+
+import app.batch
+from app.batch import run
+
+RECORD = {
+    "name": "Tab Saver",
+    "description": "Saves tabs.",
+    "target_browser": ["Chrome", "Firefox"],
+    "has_popup": True,
+}
+
+
+def test_batch_builds_each_record_and_reports_errors(tmp_path):
+    lines = io.StringIO(
+        "\n".join(
+            [
+                json.dumps(RECORD),
+                json.dumps({"id": "acme", "requirements": {**RECORD, "name": "Acme"}}),
+                "",
+                json.dumps({"id": "broken", "name": "No description"}),
+                json.dumps({**RECORD, "name": "Another"}),
+            ]
+        )
+    )
+    results = io.StringIO()
+    counts = run(lines, results, tmp_path / "dist", workers=2, max_in_flight=2)
+    assert counts == {"ok": 3, "error": 1}
+    rows = {row["line"]: row for row in map(json.loads, results.getvalue().splitlines())}
+    assert rows[4] == {
+        "line": 4,
+        "id": "broken",
+        "status": "error",
+        "error": "Missing required fields: description",
+    }
+    assert rows[2]["id"] == "acme"
+    assert set(rows[1]["artifacts"]) == {"Chrome", "Firefox"}
+    chrome = rows[2]["artifacts"]["Chrome"]
+    assert chrome["path"].endswith("acme-chrome.zip")
+    with zipfile.ZipFile(chrome["path"]) as zipf:
+        assert "popup.html" in zipf.namelist()
+    assert rows[5]["build_seconds"] <= rows[5]["total_seconds"]
+
+
+def crash_on_first(line: int, record_id: str, requirements: dict) -> dict:
+    if line == 1:
+        os._exit(1)
+    return {"line": line, "id": record_id, "status": "ok"}
+
+
+def test_a_dead_worker_fails_only_its_own_builds(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.batch, "_build", crash_on_first)
+    lines = io.StringIO(
+        "\n".join(json.dumps({"id": f"r{i}", "requirements": RECORD}) for i in range(1, 4))
+    )
+    results = io.StringIO()
+    counts = run(lines, results, tmp_path / "dist", workers=1, max_in_flight=1)
+    assert counts == {"ok": 2, "error": 1}
+    rows = [json.loads(row) for row in results.getvalue().splitlines()]
+    assert [(row["id"], row["status"]) for row in rows] == [
+        ("r1", "error"),
+        ("r2", "ok"),
+        ("r3", "ok"),
+    ]
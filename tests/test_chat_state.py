@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+
+try:
+    import app.states.chat_state as chat_state
+except RuntimeError:
+    # Reflex's pydantic v1 shim fails against sqlmodel releases newer than it supports.
+    pytest.skip("Reflex cannot be imported here.", allow_module_level=True)
+
+import reflex as rx
+from reflex.constants import RouteVar
+from reflex.istate.data import RouterData
+
+from app.services.artifacts import ArtifactStore
+from app.services.metrics import METRICS
+from app.services.model_cache import ModelListCache
+from app.services.packaging_pool import JobUpdate, PackagingCancelled
+
+REQUIREMENTS = {
+    "name": "Tab Saver",
+    "description": "Saves all open tabs into named sessions.",
+    "target_browser": ["Chrome"],
+    "inject_urls": [],
+    "has_background_script": True,
+    "has_popup": False,
+    "has_options_page": False,
+}
+
+
+class FakeExecutor:
+    """Run packaging jobs inline, recording owners and cancellations."""
+
+    def __init__(self):
+        self.idle = True
+        self.owners: list[str] = []
+        self.cancelled: list[str] = []
+        self.error: Exception | None = None
+
+    def cancel(self, owner: str):
+        self.cancelled.append(owner)
+
+    async def submit(self, fn, *args, owner: str = "", is_alive=None):
+        self.owners.append(owner)
+        yield JobUpdate("building")
+        if self.error is not None:
+            raise self.error
+        yield JobUpdate("done", result=fn(*args))
+
+
+class RecordingStore(ArtifactStore):
+    def __init__(self, root):
+        super().__init__(root)
+        self.released: list[str] = []
+
+    def release(self, session: str):
+        self.released.append(session)
+        super().release(session)
+
+
+class Session:
+    """Lock the state around ``async with`` the way Reflex's StateProxy does."""
+
+    def __init__(self, state: chat_state.ChatState):
+        object.__setattr__(self, "_state", state)
+        object.__setattr__(self, "_lock", asyncio.Lock())
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self._lock.release()
+
+    def __getattr__(self, name):
+        return getattr(self._state, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._state, name, value)
+
+
+def new_session() -> Session:
+    root = rx.State(_reflex_internal_init=True)
+    root.router_data = {RouteVar.CLIENT_TOKEN: "tab"}
+    root.router = RouterData.from_router_data(root.router_data)
+    state = root.get_substate(chat_state.ChatState.get_full_name().split("."))
+    state.requirements = dict(REQUIREMENTS)
+    state.selected_model = "fake:model"
+    return Session(state)
+
+
+async def run(handler: str, session: Session):
+    await chat_state.ChatState.event_handlers[handler].fn(session)
+
+
+@pytest.fixture
+def packaging(tmp_path, monkeypatch):
+    executor = FakeExecutor()
+    store = RecordingStore(tmp_path / "artifacts")
+
+    async def cached(model, requirements, manifest):
+        return {}
+
+    async def generate(api_key, model, session, requirements, manifest):
+        return {}, []
+
+    monkeypatch.setattr(chat_state, "PACKAGING_EXECUTOR", executor)
+    monkeypatch.setattr(chat_state, "_artifact_store", lambda: store)
+    monkeypatch.setattr(chat_state, "_client_connected", lambda client_token: True)
+    monkeypatch.setattr(chat_state.ASSET_GENERATOR, "cached", cached)
+    monkeypatch.setattr(chat_state.ASSET_GENERATOR, "generate", generate)
+    METRICS.reset()
+    return executor, store
+
+
+def test_generate_uses_the_prebuild_and_adopts_it_outside_the_lock(packaging, monkeypatch):
+    executor, store = packaging
+    session = new_session()
+    adopted = []
+    adopt = chat_state._adopt_prebuild
+
+    def spy(client_token, downloads):
+        adopted.append(session._lock.locked())
+        adopt(client_token, downloads)
+
+    monkeypatch.setattr(chat_state, "_adopt_prebuild", spy)
+
+    async def scenario():
+        await run("prebuild_extension", session)
+        prebuilt = list(session._prebuild_downloads)
+        assert executor.owners == ["tab:prebuild"]
+        assert [d["browser"] for d in prebuilt] == ["Chrome"]
+        await run("generate_extension", session)
+        assert session.downloads == prebuilt
+        assert session.generation_status == "done"
+        assert session._prebuild_downloads == []
+
+    asyncio.run(scenario())
+    assert adopted == [False]
+    assert executor.owners == ["tab:prebuild"]
+    assert "tab:prebuild:Chrome" in store.released
+    assert store.stats()["sessions"] == 1
+    rendered = METRICS.render()
+    assert 'prebuild_total{outcome="completed"} 1' in rendered
+    assert 'prebuild_generate_total{outcome="hit"} 1' in rendered
+
+
+def test_new_requirements_cancel_and_replace_the_prebuild(packaging):
+    executor, store = packaging
+    session = new_session()
+
+    async def scenario():
+        await run("prebuild_extension", session)
+        await run("prebuild_extension", session)
+        assert executor.owners == ["tab:prebuild"]
+        session.requirements = {**REQUIREMENTS, "description": "Saves tabs."}
+        await run("prebuild_extension", session)
+        assert executor.owners == ["tab:prebuild", "tab:prebuild"]
+        assert session._prebuild_requirements["description"] == "Saves tabs."
+        session.requirements = {**REQUIREMENTS, "name": "Tab Keeper"}
+        await run("generate_extension", session)
+        assert executor.owners[-1] == "tab"
+        assert session.generation_status == "done"
+
+    asyncio.run(scenario())
+    assert executor.cancelled == ["tab:prebuild", "tab:prebuild"]
+    rendered = METRICS.render()
+    assert "prebuild_wasted_total 1" in rendered
+    assert 'prebuild_generate_total{outcome="miss"} 1' in rendered
+
+
+def test_prebuilds_are_skipped_when_busy_uncached_or_cancelled(packaging, monkeypatch):
+    executor, store = packaging
+    session = new_session()
+
+    async def uncached(model, requirements, manifest):
+        return None
+
+    async def scenario():
+        executor.idle = False
+        await run("prebuild_extension", session)
+        executor.idle = True
+        with monkeypatch.context() as patch:
+            patch.setattr(chat_state.ASSET_GENERATOR, "cached", uncached)
+            await run("prebuild_extension", session)
+        assert executor.owners == []
+        assert session._prebuild_requirements == {}
+        executor.error = PackagingCancelled("Packaging job was cancelled.")
+        await run("prebuild_extension", session)
+        assert session._prebuild_downloads == []
+
+    asyncio.run(scenario())
+    rendered = METRICS.render()
+    for outcome in ("skipped", "uncached", "cancelled"):
+        assert f'prebuild_total{{outcome="{outcome}"}} 1' in rendered
+    assert "prebuild_wasted_total 1" in rendered
+
+
+def test_models_are_listed_through_gemini_while_claude_is_selected(monkeypatch):
+    models = []
+
+    async def fetch(api_key, model):
+        models.append(model)
+        return ["gemini-1.5-flash", "gemini-1.5-pro"]
+
+    monkeypatch.setattr(chat_state, "_fetch_generate_content_models", fetch)
+    monkeypatch.setattr(chat_state, "MODEL_LIST_CACHE", ModelListCache())
+    session = new_session()
+    session.api_key = "gemini-key"
+    session.selected_model = "anthropic:claude-3-5-haiku-latest"
+    asyncio.run(run("list_models", session))
+    assert models == [chat_state.DEFAULT_MODEL]
+    assert session.available_models == ["gemini-1.5-flash", "gemini-1.5-pro"]
+    assert session.selected_model == "anthropic:claude-3-5-haiku-latest"
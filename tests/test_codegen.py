@@ -0,0 +1,92 @@
+import asyncio
+import time
+import zipfile
+
+from app.services.artifacts import ArtifactStore
+from app.services.codegen import AssetGenerator, parse_files
+from app.services.fake_llm import FakeLLMClient
+from app.services.llm import ClientPool
+from app.services.packaging import create_manifest, package_extension
+from app.services.response_cache import ResponseCache
+from app.services.scheduler import LLMScheduler
+
+REQUIREMENTS = {
+    "name": "Tab Saver",
+    "description": "Saves all open tabs into named sessions.",
+    "target_browser": ["Chrome"],
+    "inject_urls": ["*://*.github.com/*"],
+    "has_background_script": True,
+    "has_popup": True,
+    "has_options_page": True,
+}
+LATENCY = 0.2
+
+
+def generator(tmp_path, clients: list) -> AssetGenerator:
+    def factory(api_key: str, model: str) -> FakeLLMClient:
+        client = FakeLLMClient(api_key, model, latency=LATENCY, jitter=0)
+        clients.append(client)
+        return client
+
+    return AssetGenerator(
+        ResponseCache(tmp_path / "snippets.sqlite3"),
+        ClientPool(factory),
+        LLMScheduler(rate=100, burst=10, max_concurrency=10),
+    )
+
+
+def test_assets_are_generated_concurrently_and_cached(tmp_path):
+    async def scenario():
+        clients = []
+        codegen = generator(tmp_path, clients)
+        manifest = create_manifest(REQUIREMENTS)
+        start = time.perf_counter()
+        assets, failed = await codegen.generate("key", "fake:model", "tab", REQUIREMENTS, manifest)
+        assert failed == []
+        assert time.perf_counter() - start < 2 * LATENCY
+        assert clients[0].calls == 4
+        assert set(assets) == {
+            "content.js",
+            "background.js",
+            "popup.html",
+            "popup.js",
+            "popup.css",
+            "options.html",
+            "options.js",
+            "options.css",
+        }
+        assert "<script src='popup.js'>" in assets["popup.html"]
+        similar = {**REQUIREMENTS, "name": "Tabs", "description": "saves all open tabs into NAMED sessions"}
+        assert await codegen.generate("key", "fake:model", "tab", similar, manifest) == (assets, [])
+        assert clients[0].calls == 4
+        assert await codegen.cached("fake:other", similar, manifest) is None
+        return assets
+
+    assets = asyncio.run(scenario())
+    artifact = package_extension(REQUIREMENTS, ArtifactStore(tmp_path / "artifacts"), assets=assets)["Chrome"]
+    with zipfile.ZipFile(artifact.path) as zipf:
+        assert zipf.read("content.js").decode() == assets["content.js"]
+
+
+def test_parse_files_accepts_a_bare_code_block_for_single_file_assets():
+    assert parse_files("```js\nchrome.tabs.query({});\n```", "background") == {
+        "background.js": "chrome.tabs.query({});"
+    }
+    assert parse_files('{"popup.js": "x()", "extra": 1}', "popup") == {"popup.js": "x()"}
+
+
+def test_failed_assets_are_reported(tmp_path):
+    class Broken(FakeLLMClient):
+        async def send_message(self, *args):
+            raise RuntimeError("quota exceeded")
+
+    async def scenario():
+        codegen = AssetGenerator(
+            ResponseCache(tmp_path / "snippets.sqlite3"),
+            ClientPool(lambda api_key, model: Broken(api_key, model)),
+            LLMScheduler(rate=100, burst=10, max_concurrency=10),
+        )
+        manifest = create_manifest({**REQUIREMENTS, "has_options_page": False})
+        return await codegen.generate("key", "fake:model", "tab", REQUIREMENTS, manifest)
+
+    assert asyncio.run(scenario()) == ({}, ["content", "background", "popup"])
@@ -0,0 +1,42 @@
+from app.services.context import ConversationWindow, estimate_tokens
+
+
+def make_transcript(turns: int) -> list[dict]:
+    messages = [{"role": "assistant", "content": "What should it be called?"}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"answer {i} " + "detail " * 40})
+        messages.append({"role": "assistant", "content": f"question {i + 1}?"})
+    messages.append({"role": "user", "content": "latest answer"})
+    return messages
+
+
+def test_recent_turns_are_verbatim_and_older_ones_summarised():
+    window = ConversationWindow(token_budget=10_000, keep_turns=2)
+    result = window.build("SYSTEM", make_transcript(10))
+    assert result.message == "latest answer"
+    assert len(result.history) == 4
+    assert result.history[-1] == {"role": "model", "parts": [{"text": "question 10?"}]}
+    assert result.summarized_count == 17
+    assert result.system_instruction.startswith("SYSTEM")
+    assert "User: answer 7" in result.summary
+    assert result.prompt_tokens < result.full_prompt_tokens
+
+
+def test_summary_is_folded_incrementally_and_budget_is_respected():
+    window = ConversationWindow(token_budget=300, keep_turns=6, summary_tokens=100)
+    transcript = make_transcript(6)
+    first = window.build("SYSTEM", transcript)
+    transcript += [
+        {"role": "assistant", "content": "another question?"},
+        {"role": "user", "content": "another answer"},
+    ]
+    second = window.build("SYSTEM", transcript, first.summary, first.summarized_count)
+    assert second.summarized_count >= first.summarized_count
+    assert estimate_tokens(second.summary) <= 100
+    assert second.prompt_tokens <= 300
+    assert second.message == "another answer"
+    prompt_tokens = [
+        window.build("SYSTEM", make_transcript(turns)).prompt_tokens
+        for turns in (10, 50, 100)
+    ]
+    assert max(prompt_tokens) <= 300
@@ -0,0 +1,49 @@
+import hashlib
+
+import pytest
+from starlette.testclient import TestClient
+
+import app.api
+from app.services.artifacts import ArtifactStore
+
+DATA = bytes(range(256)) * 1024
+
+
+@pytest.fixture
+def artifact(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.api, "ARTIFACTS_DIR", tmp_path / "artifacts")
+    store = ArtifactStore(tmp_path / "artifacts")
+    return store.put("a" * 64, "tabsaver-chrome.zip", DATA, hashlib.sha256(DATA).hexdigest())
+
+
+def test_download_streams_the_archive_with_validators(artifact):
+    client = TestClient(app.api.api)
+    url = f"/downloads/{artifact.digest}/tabsaver-chrome.zip"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["etag"] == f'"{artifact.sha256}"'
+    assert response.headers["content-length"] == str(len(DATA))
+    assert response.headers["accept-ranges"] == "bytes"
+    cached = client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert client.get(f"/downloads/{artifact.digest}/missing.zip").status_code == 404
+    assert client.get(f"/downloads/{'b' * 64}/tabsaver-chrome.zip").status_code == 404
+
+
+def test_download_serves_byte_ranges(artifact):
+    client = TestClient(app.api.api)
+    url = f"/downloads/{artifact.digest}/tabsaver-chrome.zip"
+    partial = client.get(url, headers={"Range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.content == DATA[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    assert client.get(url, headers={"Range": "bytes=-10"}).content == DATA[-10:]
+    assert client.get(url, headers={"Range": f"bytes={len(DATA) - 5}-"}).content == DATA[-5:]
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200
+    assert len(stale.content) == len(DATA)
+    unsatisfiable = client.get(url, headers={"Range": f"bytes={len(DATA)}-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(DATA)}"
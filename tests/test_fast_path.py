@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.fast_path import DONE_MESSAGE, QUESTIONS, extract_answer, infer_pending_field
+
+REQUIREMENTS = {
+    "name": "Tab Saver",
+    "description": "Saves tabs.",
+    "target_browser": [],
+    "inject_urls": [],
+    "has_background_script": False,
+    "has_popup": False,
+    "has_options_page": False,
+}
+
+
+@pytest.mark.parametrize(
+    "message, pending, field, value, next_field",
+    [
+        ("Chrome and Firefox", "target_browser", "target_browser", ["Chrome", "Firefox"], "inject_urls"),
+        ("yes, a popup", "has_popup", "has_popup", True, "has_options_page"),
+        ("*://*.github.com/*", "", "inject_urls", ["*://*.github.com/*"], "has_background_script"),
+        ("none", "inject_urls", "inject_urls", [], "has_background_script"),
+        ("no", "has_options_page", "has_options_page", False, ""),
+    ],
+)
+def test_trivial_answers_are_handled_locally(message, pending, field, value, next_field):
+    answer = extract_answer(message, REQUIREMENTS, pending)
+    assert answer.confidence == 1.0
+    assert answer.requirements == {**REQUIREMENTS, field: value}
+    assert answer.next_field == next_field
+    assert answer.reply.endswith(QUESTIONS[next_field] if next_field else DONE_MESSAGE)
+
+
+@pytest.mark.parametrize(
+    "message, pending",
+    [
+        ("Tab Saver", "name"),
+        ("Firefox", "name"),
+        ("*://*.github.com/*", "description"),
+        ("twitter, reddit and youtube", "inject_urls"),
+        ("yes, but not on weekends", "has_popup"),
+        ("sounds good", ""),
+    ],
+)
+def test_ambiguous_answers_defer_to_the_model(message, pending):
+    answer = extract_answer(message, REQUIREMENTS, pending)
+    assert answer is None or answer.confidence < 0.9
+
+
+def test_infer_pending_field_from_question():
+    assert infer_pending_field("Nice! Which browsers do you want to target?") == "target_browser"
+    assert infer_pending_field("Does it need a background script?") == "has_background_script"
+    assert infer_pending_field("All set. You can generate the extension now.") == ""
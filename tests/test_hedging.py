@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.services.fake_llm import FakeLLMClient
+from app.services.hedging import HedgedRouter, LatencyTracker
+from app.services.llm import ClientPool, split_model
+from app.services.metrics import METRICS
+
+LATENCIES = {"slow": 0.5, "fast": 0.01, "broken": 0.0}
+
+
+class FakeProvider(FakeLLMClient):
+    cancelled: list[str] = []
+
+    async def send_message(self, history, message, *args):
+        if self.model == "broken":
+            return "not json"
+        try:
+            return await super().send_message(history, message, *args)
+        except asyncio.CancelledError:
+            FakeProvider.cancelled.append(self.model)
+            raise
+
+    async def stream_message(self, history, message, *args):
+        try:
+            async for text in super().stream_message(history, message, *args):
+                yield text
+        except asyncio.CancelledError:
+            FakeProvider.cancelled.append(self.model)
+            raise
+
+
+def fake_pool() -> ClientPool:
+    def factory(api_key: str, model: str) -> FakeProvider:
+        name = split_model(model)[1]
+        return FakeProvider(api_key, name, latency=LATENCIES[name], jitter=0)
+
+    return ClientPool(factory)
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    async def scenario():
+        FakeProvider.cancelled.clear()
+        tracker = LatencyTracker(default=0.05)
+        router = HedgedRouter(fake_pool(), ["fake:fast"], tracker)
+        reply = await router.send_message("key", "fake:slow", [], "hello")
+        assert "hello" in reply["response"]
+        assert FakeProvider.cancelled == ["slow"]
+        assert tracker.stats() == {"fake:fast_p95": 0.05}
+
+    asyncio.run(scenario())
+
+
+def test_fast_primary_never_starts_the_fallback():
+    async def scenario():
+        pool = fake_pool()
+        router = HedgedRouter(pool, ["fake:slow"], LatencyTracker(default=0.2))
+        METRICS.reset()
+        await router.send_message("key", "fake:fast", [], "hello")
+        assert len(pool) == 1
+        assert 'path="process_message",phase="json_parse"} 1' in METRICS.render()
+
+    asyncio.run(scenario())
+
+
+def test_invalid_json_falls_through_and_thresholds_follow_observed_latency():
+    async def scenario():
+        router = HedgedRouter(fake_pool(), ["fake:fast"], LatencyTracker(default=10))
+        reply = await router.send_message("key", "fake:broken", [], "hello")
+        assert reply["requirements"]["name"] == "Fake Extension"
+        with pytest.raises(ValueError):
+            await HedgedRouter(fake_pool()).send_message("key", "fake:broken", [], "hi")
+
+    asyncio.run(scenario())
+    tracker = LatencyTracker(min_samples=3)
+    for seconds in (0.1, 0.2, 0.3, 0.9):
+        tracker.record("fake:fast", seconds)
+    assert tracker.threshold("fake:fast") == 0.9
+    assert tracker.threshold("fake:unknown") == tracker.default
+
+
+def test_streams_hedge_on_time_to_first_text_and_only_the_winner_streams():
+    async def scenario():
+        FakeProvider.cancelled.clear()
+        first_text = LatencyTracker(default=0.05)
+        tracker = LatencyTracker()
+        router = HedgedRouter(fake_pool(), ["fake:fast"], tracker, first_text=first_text)
+        texts = []
+
+        async def on_text(text):
+            texts.append(text)
+
+        reply = await router.stream_message("key", "fake:slow", [], "hello", on_text=on_text)
+        assert texts[-1] == reply["response"]
+        assert all(reply["response"].startswith(text) for text in texts)
+        assert FakeProvider.cancelled == ["slow"]
+        assert list(first_text.stats()) == ["fake:fast_p95"]
+        assert list(tracker.stats()) == ["fake:fast_p95"]
+
+    asyncio.run(scenario())
+
+
+def test_the_whole_exchange_is_bounded_by_the_timeout():
+    async def scenario():
+        FakeProvider.cancelled.clear()
+        router = HedgedRouter(fake_pool(), timeout=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await router.send_message("key", "fake:slow", [], "hello")
+        with pytest.raises(asyncio.TimeoutError):
+            await router.stream_message("key", "fake:slow", [], "hello")
+        assert FakeProvider.cancelled == ["slow", "slow"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+import random
+import subprocess
+import sys
+
+from app.services.llm import ClientPool
+
+
+class FakeClient:
+    def __init__(self, api_key: str, model: str):
+        self.api_key = api_key
+        self.model = model
+        self.closed = False
+
+    async def send_message(self, history: list[dict], message: str) -> str:
+        await asyncio.sleep(random.uniform(0, 0.005))
+        return f"{self.api_key}:{self.model}:{message}"
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_sessions_with_different_keys_never_cross_contaminate():
+    async def session(pool: ClientPool, index: int):
+        api_key = f"key-{index % 10}"
+        for turn in range(5):
+            async with pool.client(api_key, "gemini-1.5-flash") as client:
+                reply = await client.send_message([], f"{index}-{turn}")
+            assert reply == f"{api_key}:gemini-1.5-flash:{index}-{turn}"
+
+    async def scenario():
+        pool = ClientPool(FakeClient)
+        await asyncio.gather(*(session(pool, i) for i in range(100)))
+        assert pool.stats()["created"] == 10
+        assert pool.stats()["reused"] == 490
+
+    asyncio.run(scenario())
+
+
+def test_idle_and_overflow_clients_are_evicted_unless_leased():
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    async def scenario():
+        clock = Clock()
+        pool = ClientPool(FakeClient, max_size=2, idle_timeout=10, clock=clock)
+        async with pool.client("a", "m") as first:
+            async with pool.client("b", "m"):
+                async with pool.client("c", "m"):
+                    assert len(pool) == 3
+            assert len(pool) == 3
+        clock.now = 5
+        async with pool.client("d", "m"):
+            pass
+        assert len(pool) == 2
+        clock.now = 100
+        async with pool.client("e", "m"):
+            pass
+        assert len(pool) == 1
+        await asyncio.sleep(0)
+        assert first.closed
+
+    asyncio.run(scenario())
+
+
+def test_provider_sdks_are_imported_on_first_use_only():
+    check = (
+        "import sys, app.services.llm as llm; "
+        "assert 'google.genai' not in sys.modules; "
+        "llm.import_sdk('gemini'); "
+        "assert 'google.genai' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", check], check=True)
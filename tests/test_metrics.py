@@ -0,0 +1,38 @@
+import pytest
+from starlette.testclient import TestClient
+
+from app.services.metrics import METRICS, Metrics
+
+
+def test_spans_render_as_prometheus_histograms_and_error_counters():
+    metrics = Metrics()
+    with metrics.span("process_message", "llm_call"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("process_message", "json_parse"):
+            raise ValueError("bad json")
+    metrics.observe("prompt_tokens", 300)
+    metrics.register_gauges("model_list_cache", lambda: {"hits": 3})
+    text = metrics.render()
+    assert '# TYPE extension_builder_phase_duration_seconds histogram' in text
+    assert 'extension_builder_phase_duration_seconds_count{path="process_message",phase="llm_call"} 1' in text
+    assert 'extension_builder_errors_total{error="ValueError",path="process_message",phase="json_parse"} 1' in text
+    assert 'extension_builder_prompt_tokens_bucket{le="512"} 1' in text
+    assert 'extension_builder_model_list_cache{stat="hits"} 3' in text
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    with metrics.span("process_message", "llm_call"):
+        metrics.inc("fast_path_total")
+    assert metrics.render() == "\n"
+
+
+def test_metrics_route_serves_text_format():
+    from app.api import api
+
+    METRICS.inc("fast_path_total", outcome="hit")
+    response = TestClient(api).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'extension_builder_fast_path_total{outcome="hit"}' in response.text
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.services.model_cache import ModelListCache, key_fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_fetch(calls: list, models=("gemini-1.5-flash",), delay=0.01):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return list(models)
+
+    return fetch
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    async def scenario():
+        cache = ModelListCache()
+        calls = []
+        fetch = make_fetch(calls)
+        results = await asyncio.gather(*(cache.get("key", fetch) for _ in range(50)))
+        assert all(r == ["gemini-1.5-flash"] for r in results)
+        assert len(calls) == 1
+        assert cache.stats()["misses"] == 50
+        await cache.get("key", fetch)
+        assert cache.stats()["hits"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_stale_entry_is_served_while_refreshing():
+    async def scenario():
+        clock = FakeClock()
+        cache = ModelListCache(ttl=10, stale_ttl=10, clock=clock)
+        calls = []
+        await cache.get("key", make_fetch(calls, ["old"]))
+        clock.now = 15
+        assert await cache.get("key", make_fetch(calls, ["new"])) == ["old"]
+        await asyncio.sleep(0.05)
+        assert await cache.get("key", make_fetch(calls, ["newer"])) == ["new"]
+        assert len(calls) == 2
+        clock.now = 100
+        assert await cache.get("key", make_fetch(calls, ["newest"])) == ["newest"]
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_not_cached_and_raw_key_is_never_stored():
+    async def scenario():
+        cache = ModelListCache()
+
+        async def failing():
+            raise RuntimeError("quota")
+
+        with pytest.raises(RuntimeError):
+            await cache.get("secret-key", failing)
+        assert await cache.get("secret-key", make_fetch([])) == ["gemini-1.5-flash"]
+        assert list(cache._entries) == [key_fingerprint("secret-key")]
+
+    asyncio.run(scenario())
+
+
+def test_expired_entries_are_dropped():
+    async def scenario():
+        clock = FakeClock()
+        cache = ModelListCache(ttl=10, stale_ttl=10, clock=clock)
+        await cache.get("old-key", make_fetch([]))
+        await cache.get("idle-key", make_fetch([]))
+        clock.now = 25
+        await cache.get("new-key", make_fetch([]))
+        assert cache.stats()["entries"] == 1
+        clock.now = 50
+        refresh = asyncio.create_task(cache.get("new-key", make_fetch([])))
+        await asyncio.sleep(0)
+        assert cache.stats()["entries"] == 0
+        await refresh
+        assert cache.stats()["entries"] == 1
+
+    asyncio.run(scenario())
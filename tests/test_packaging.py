@@ -0,0 +1,118 @@
+import hashlib
+import io
+import json
+import zipfile
+
+from app.services.artifacts import ArtifactStore
+from app.services.packaging import (
+    build_extension_files,
+    build_zip,
+    create_manifest,
+    package_extension,
+    release_variants,
+)
+
+REQUIREMENTS = {
+    "name": "Tab Saver",
+    "description": "Saves tabs.",
+    "target_browser": ["Chrome", "Firefox"],
+    "inject_urls": ["*://*.github.com/*"],
+    "has_background_script": True,
+    "has_popup": True,
+    "has_options_page": False,
+}
+
+
+def test_package_extension_writes_only_the_archive(tmp_path):
+    artifact = package_extension(
+        {**REQUIREMENTS, "target_browser": ["Chrome"]}, ArtifactStore(tmp_path / "artifacts")
+    )["Chrome"]
+    assert artifact.relative_path == f"artifacts/{artifact.digest}/tabsaver-chrome.zip"
+    assert sorted(p.name for p in artifact.path.parent.iterdir()) == [
+        ".sha256",
+        "tabsaver-chrome.zip",
+    ]
+    data = artifact.path.read_bytes()
+    with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+        assert sorted(zipf.namelist()) == [
+            "background.js",
+            "content.js",
+            "manifest.json",
+            "popup.css",
+            "popup.html",
+            "popup.js",
+        ]
+        manifest = json.loads(zipf.read("manifest.json"))
+    assert manifest == create_manifest(REQUIREMENTS, "Chrome")
+    assert "browser_specific_settings" not in manifest
+
+
+def test_each_target_gets_its_own_variant_sharing_the_assets(tmp_path):
+    artifacts = package_extension(REQUIREMENTS, ArtifactStore(tmp_path))
+    assert list(artifacts) == ["Chrome", "Firefox"]
+    contents = {}
+    for target, artifact in artifacts.items():
+        with zipfile.ZipFile(artifact.path) as zipf:
+            contents[target] = {name: zipf.read(name) for name in zipf.namelist()}
+    chrome = json.loads(contents["Chrome"].pop("manifest.json"))
+    firefox = json.loads(contents["Firefox"].pop("manifest.json"))
+    assert contents["Chrome"] == contents["Firefox"]
+    assert chrome["background"] == {"service_worker": "background.js"}
+    assert firefox["background"] == {"scripts": ["background.js"]}
+    assert firefox["browser_specific_settings"]["gecko"]["id"] == "tab-saver@example.com"
+    defaulted = package_extension({**REQUIREMENTS, "target_browser": []}, ArtifactStore(tmp_path))
+    assert list(defaulted) == ["Chrome"]
+
+
+def test_identical_requirements_reuse_the_artifact_and_names_do_not_collide(tmp_path):
+    store = ArtifactStore(tmp_path / "artifacts")
+    first = package_extension(REQUIREMENTS, store, "session-a")
+    again = package_extension(dict(REQUIREMENTS), store, "session-b")
+    other = package_extension({**REQUIREMENTS, "description": "Other."}, store, "session-c")
+    assert again == first
+    assert other["Chrome"].path.name == first["Chrome"].path.name
+    assert other["Chrome"].path != first["Chrome"].path
+    assert store.stats()["hits"] == 2
+    assert store.stats()["sessions"] == 6
+
+
+def test_sessions_release_variants_they_no_longer_build(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=0)
+    both = package_extension(REQUIREMENTS, store, "tab")
+    chrome = package_extension({**REQUIREMENTS, "target_browser": ["Chrome"]}, store, "tab")
+    assert store.stats()["sessions"] == 1
+    store.put("a" * 64, "a.zip", b"1", "sha")
+    assert chrome["Chrome"].path.exists() and not both["Firefox"].path.exists()
+    release_variants(store, "tab")
+    assert store.stats()["sessions"] == 0
+
+
+def test_unreferenced_artifacts_are_evicted_by_size_and_age(tmp_path):
+    now = [0.0]
+    store = ArtifactStore(tmp_path, max_bytes=10, max_age=100, clock=lambda: now[0])
+    kept = store.put("a" * 64, "a.zip", b"12345678", "sha", session="tab")
+    old = store.put("b" * 64, "b.zip", b"12345678", "sha")
+    now[0] = 1
+    store.put("c" * 64, "c.zip", b"12345678", "sha")
+    assert kept.path.exists() and not old.path.exists()
+    now[0] = 200
+    newest = store.put("d" * 64, "d.zip", b"1", "sha")
+    assert store.stats()["artifacts"] == 1
+    assert newest.path.exists() and not kept.path.exists()
+
+
+def test_archives_are_byte_identical_and_hashed_while_written(tmp_path):
+    files = build_extension_files(create_manifest(REQUIREMENTS, "Chrome"))
+    archive, sha256 = build_zip(files)
+    again, again_sha256 = build_zip(dict(reversed(list(files.items()))))
+    assert archive == again
+    assert sha256 == again_sha256 == hashlib.sha256(archive).hexdigest()
+    with zipfile.ZipFile(io.BytesIO(archive)) as zipf:
+        infos = zipf.infolist()
+        assert [i.filename for i in infos] == sorted(files)
+        assert {i.date_time for i in infos} == {(1980, 1, 1, 0, 0, 0)}
+        assert {i.external_attr >> 16 for i in infos} == {0o644}
+        assert zipf.testzip() is None
+    artifact = package_extension(REQUIREMENTS, ArtifactStore(tmp_path))["Chrome"]
+    assert artifact.sha256 == sha256
+    assert ArtifactStore(tmp_path).get(artifact.digest).sha256 == sha256
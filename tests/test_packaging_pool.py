@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.packaging_pool import (
+    PackagingCancelled,
+    PackagingExecutor,
+    PackagingQueueFull,
+    PackagingTimeout,
+)
+
+
+async def collect(executor: PackagingExecutor, fn, *args, **kwargs) -> list:
+    return [update async for update in executor.submit(fn, *args, **kwargs)]
+
+
+def test_jobs_report_queue_position_and_run_one_at_a_time():
+    release = threading.Event()
+
+    def build(name: str) -> str:
+        release.wait(5)
+        return f"{name}.zip"
+
+    async def scenario():
+        executor = PackagingExecutor(max_workers=1, max_queue=4, poll_interval=0.01)
+        tasks = [asyncio.create_task(collect(executor, build, f"ext{i}")) for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert executor.stats() == {"queued": 2, "running": 1}
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    first, second, third = asyncio.run(scenario())
+    assert [u.status for u in first] == ["building", "done"]
+    assert first[-1].result == "ext0.zip"
+    assert [(u.status, u.position) for u in third] == [
+        ("queued", 2),
+        ("queued", 1),
+        ("building", 0),
+        ("done", 0),
+    ]
+
+
+def test_full_queue_rejects_and_dead_sessions_are_cancelled():
+    release = threading.Event()
+
+    async def scenario():
+        executor = PackagingExecutor(max_workers=1, max_queue=1, poll_interval=0.01)
+        running = asyncio.create_task(collect(executor, release.wait, 5))
+        await asyncio.sleep(0.01)
+        alive = [True]
+        queued = asyncio.create_task(
+            collect(executor, lambda: "never", is_alive=lambda: alive[0])
+        )
+        await asyncio.sleep(0.01)
+        with pytest.raises(PackagingQueueFull):
+            await collect(executor, lambda: "rejected")
+        alive[0] = False
+        with pytest.raises(PackagingCancelled):
+            await queued
+        release.set()
+        await running
+        assert executor.stats() == {"queued": 0, "running": 0}
+
+    asyncio.run(scenario())
+
+
+def test_newer_job_from_same_owner_supersedes_and_timeouts_hold_the_slot():
+    async def scenario():
+        executor = PackagingExecutor(max_workers=1, timeout=0.05, poll_interval=0.01)
+        blocker = threading.Event()
+        slow = asyncio.create_task(collect(executor, blocker.wait, 1))
+        await asyncio.sleep(0.01)
+        old = asyncio.create_task(collect(executor, lambda: "old", owner="tab"))
+        await asyncio.sleep(0.01)
+        new = asyncio.create_task(collect(executor, lambda: "new", owner="tab"))
+        with pytest.raises(PackagingCancelled):
+            await old
+        with pytest.raises(PackagingTimeout, match="took too long"):
+            await slow
+        assert executor.stats() == {"queued": 1, "running": 1}
+        blocker.set()
+        assert (await new)[-1].result == "new"
+
+    asyncio.run(scenario())
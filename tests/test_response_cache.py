@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.services.response_cache import CachedClient, ResponseCache, request_key
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def send_message(self, history, message, system_instruction=None):
+        self.calls += 1
+        return f"reply to {message}"
+
+    async def stream_message(self, history, message, system_instruction=None):
+        self.calls += 1
+        for part in ("reply ", "to ", message):
+            yield part
+
+
+async def collect(stream) -> str:
+    return "".join([text async for text in stream])
+
+
+def test_record_then_replay_offline(tmp_path):
+    async def scenario():
+        path = tmp_path / "llm.sqlite3"
+        upstream = CountingClient()
+        recorder = CachedClient(upstream, "m", ResponseCache(path, mode="record"))
+        assert await collect(recorder.stream_message([], "hi", "sys")) == "reply to hi"
+        assert await recorder.send_message([], "bye") == "reply to bye"
+        replay = CachedClient(None, "m", ResponseCache(path, mode="replay"))
+        assert await collect(replay.stream_message([], "hi", "sys")) == "reply to hi"
+        assert await replay.send_message([], "bye") == "reply to bye"
+        with pytest.raises(LookupError):
+            await replay.send_message([], "hi", "other system prompt")
+        assert upstream.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_cache_mode_serves_repeats_and_evicts_least_recently_used(tmp_path):
+    async def scenario():
+        cache = ResponseCache(tmp_path / "llm.sqlite3", max_bytes=30, mode="cache")
+        upstream = CountingClient()
+        client = CachedClient(upstream, "m", cache)
+        await client.send_message([], "one")
+        await client.send_message([], "one")
+        assert upstream.calls == 1
+        await client.send_message([], "two")
+        await client.send_message([], "three")
+        assert cache.get(request_key("m", [], "one", None)) is None
+        assert cache.get(request_key("m", [], "three", None)) == "reply to three"
+
+    asyncio.run(scenario())
+
+
+def test_replies_that_fail_validation_are_not_stored(tmp_path):
+    async def scenario():
+        cache = ResponseCache(tmp_path / "llm.sqlite3", mode="cache")
+        upstream = CountingClient()
+        client = CachedClient(upstream, "m", cache, lambda text, schema: "good" in text)
+        await client.send_message([], "bad")
+        await client.send_message([], "bad")
+        assert upstream.calls == 2
+        await client.send_message([], "good")
+        await client.send_message([], "good")
+        assert upstream.calls == 3
+        assert cache.stats()["rejected"] == 2
+
+    asyncio.run(scenario())
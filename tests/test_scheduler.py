@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.services.fake_llm import FakeLLMClient, FakeRateLimitError
+from app.services.scheduler import LLMScheduler, retry_after
+
+
+async def collect(scheduler: LLMScheduler, api_key: str, session: str, call) -> list:
+    return [update async for update in scheduler.submit(api_key, session, call)]
+
+
+def test_rate_limited_calls_are_retried_after_the_requested_delay():
+    async def scenario():
+        scheduler = LLMScheduler(base_delay=0.001, seed=1)
+        client = FakeLLMClient(latency=0, jitter=0, rate_limited_calls=2, retry_after=0.02)
+        updates = await collect(
+            scheduler, "key", "tab", lambda: client.send_message([], "hello")
+        )
+        assert [u.status for u in updates] == ["retrying", "retrying", "done"]
+        assert [u.wait for u in updates[:2]] == [0.02, 0.02]
+        assert "hello" in updates[-1].result
+        assert client.calls == 3
+        assert scheduler.stats() == {"keys": 1, "queued": 0, "running": 0, "retries": 2}
+
+    asyncio.run(scenario())
+
+
+def test_retries_give_up_and_other_errors_propagate():
+    async def scenario():
+        scheduler = LLMScheduler(max_retries=1, base_delay=0.001)
+        client = FakeLLMClient(latency=0, jitter=0, rate_limited_calls=5)
+        with pytest.raises(FakeRateLimitError):
+            await collect(scheduler, "key", "tab", lambda: client.send_message([], "hi"))
+        assert client.calls == 2
+
+        async def broken():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await collect(scheduler, "key", "tab", broken)
+        assert scheduler.stats()["running"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_sessions_sharing_a_key_are_served_round_robin_within_the_bucket():
+    async def scenario():
+        scheduler = LLMScheduler(rate=50, burst=1, max_concurrency=1, poll_interval=0.01)
+        order = []
+        positions = {}
+
+        async def run(session: str, turn: int):
+            async def call():
+                order.append(session)
+                await asyncio.sleep(0)
+
+            updates = await collect(scheduler, "shared", session, call)
+            positions[(session, turn)] = [u.position for u in updates if u.status == "queued"]
+
+        await asyncio.gather(
+            *(run("busy", turn) for turn in range(3)), run("quiet", 0)
+        )
+        assert order == ["busy", "quiet", "busy", "busy"]
+        assert positions[("quiet", 0)][0] == 1
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_reads_headers_and_retry_info():
+    class Response:
+        headers = {"retry-after": "7"}
+
+    class HeaderError(Exception):
+        response = Response()
+
+    class DetailError(Exception):
+        details = {
+            "error": {
+                "details": [
+                    {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "12s"}
+                ]
+            }
+        }
+
+    assert retry_after(HeaderError()) == 7
+    assert retry_after(DetailError()) == 12
+    assert retry_after(ValueError()) is None
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from app.services.streaming import ResponseStreamParser, Throttle
+
+REPLY = "```json\n" + json.dumps(
+    {
+        "requirements": {"name": "Tab Saver", "inject_urls": ["*://*/*"]},
+        "response": 'Great! "Tab Saver" it is.\nWhat should it do? é\\',
+    }
+) + "\n```"
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(REPLY)])
+def test_parser_reports_response_prefixes(size):
+    parser = ResponseStreamParser()
+    expected = json.loads(REPLY.strip("`json\n"))
+    seen = []
+    for i in range(0, len(REPLY), size):
+        if parser.feed(REPLY[i : i + size]):
+            seen.append(parser.response_text)
+    assert seen[-1] == expected["response"]
+    assert all(expected["response"].startswith(text) for text in seen)
+    assert parser.complete
+    assert parser.result() == expected
+
+
+def test_parser_without_object_raises():
+    parser = ResponseStreamParser()
+    parser.feed('{"response": "truncated')
+    assert parser.response_text == "truncated"
+    assert not parser.complete
+    with pytest.raises(ValueError):
+        parser.result()
+
+
+def test_throttle_limits_pushes():
+    throttle = Throttle(60)
+    assert throttle.ready()
+    assert not throttle.ready()
+
+
+def test_fake_llm_stream_parses():
+    import asyncio
+
+    from app.services.fake_llm import FAKE_REQUIREMENTS, FakeLLMClient
+
+    async def scenario():
+        parser = ResponseStreamParser()
+        client = FakeLLMClient(latency=0.01, jitter=0, chunk_size=5)
+        async for text in client.stream_message([], "hello"):
+            parser.feed(text)
+        return parser.result()
+
+    assert asyncio.run(scenario())["requirements"] == FAKE_REQUIREMENTS
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services.metrics import METRICS
+from app.services.structured import REPLY_SCHEMA, conforms, merge_requirements, parse_reply, repair_json
+
+CURRENT = {
+    "name": "Tab Saver",
+    "description": "Saves tabs.",
+    "target_browser": ["Chrome"],
+    "inject_urls": [],
+    "has_background_script": False,
+    "has_popup": True,
+    "has_options_page": False,
+}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('```json\n{"response": "Hi", "requirements": {"name": "X",},}\n```', {"name": "X"}),
+        ('Sure! {"response": "Hi", "requirements": {"inject_urls": ["*://a/*",]}} {"x": 1}', {"inject_urls": ["*://a/*"]}),
+        ('{"response": "Hi", "requirements": {"name": "X", "has_popup": tr', {"name": "X"}),
+        ('{"response": "Hi", "requirements": {"name": "X", "descr', {"name": "X"}),
+        ('{"response": "Hi", "requirements": {"target_browser": ["Chrome", "Fire', {}),
+        ('{"response": "Hi", "requirements": {"inject_urls": ["*://a/*", "*://b', {}),
+        ('{"response": "Hi", "requirements": {"has_popup": true, "name": "Tab Sa', {"has_popup": True}),
+    ],
+)
+def test_repair_handles_fences_trailing_commas_and_truncation(text, expected):
+    assert repair_json(text) == {"response": "Hi", "requirements": expected}
+
+
+def test_only_the_response_text_is_salvaged_from_a_truncated_reply():
+    assert repair_json('{"response": "Hello the') == {"response": "Hello the"}
+
+
+@pytest.mark.parametrize("text", ['{"response": null}', '{"response": " "}', '{"requirements": {}}'])
+def test_parse_reply_rejects_a_missing_or_empty_response(text):
+    with pytest.raises(ValueError):
+        parse_reply(text)
+
+
+def test_parse_reply_counts_outcomes():
+    METRICS.reset()
+    parse_reply('{"response": "ok"}')
+    parse_reply('{"response": "ok",}')
+    with pytest.raises(ValueError):
+        parse_reply("no json here")
+    rendered = METRICS.render()
+    for outcome in ("ok", "repaired", "failed"):
+        assert f'llm_parse_total{{outcome="{outcome}"}} 1' in rendered
+
+
+def test_merge_applies_valid_deltas_and_keeps_good_state():
+    METRICS.reset()
+    merged = merge_requirements(
+        CURRENT,
+        {
+            "target_browser": ["firefox", "Chrome", "Firefox"],
+            "has_background_script": "true",
+            "name": "",
+            "description": 42,
+            "inject_urls": ["Fire"],
+            "icon": "orange",
+            "theme": "dark",
+        },
+    )
+    rendered = METRICS.render()
+    assert 'requirements_rejected_fields_total{field="description"} 1' in rendered
+    assert 'requirements_rejected_fields_total{field="unknown"} 2' in rendered
+    assert merged == {
+        **CURRENT,
+        "target_browser": ["Firefox", "Chrome"],
+        "has_background_script": True,
+        "inject_urls": ["Fire"],
+    }
+    assert merge_requirements(CURRENT, {"target_browser": ["Chrome", "Fire"]}) == CURRENT
+    assert merge_requirements(CURRENT, None) == CURRENT
+
+
+def test_conforms_requires_an_intact_reply():
+    assert conforms('{"response": "Hi"}', REPLY_SCHEMA)
+    assert not conforms('{"response": "Hi", "requirements": {"name": "X",}}', REPLY_SCHEMA)
+    assert not conforms('{"response": ""}', REPLY_SCHEMA)
+    assert not conforms('{"response": "Hel', REPLY_SCHEMA)
+    assert conforms("anything", None)
@@ -0,0 +1,27 @@
+from app.services.transcripts import TranscriptStore
+
+
+def test_transcript_round_trip_by_position(tmp_path):
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3")
+    messages = [
+        {"role": "user" if i % 2 else "assistant", "content": f"Message {i} " * 40}
+        for i in range(10)
+    ]
+    store.append("a", 0, messages[:6])
+    store.append("a", 6, messages[6:])
+    store.append("b", 0, messages[:2])
+    assert store.count("a") == 10
+    assert store.load("a", 3, 7) == messages[3:7]
+    assert store.load("b", 0, 100) == messages[:2]
+    stats = store.stats()
+    assert stats["appended"] == 12
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+    store.close()
+    assert TranscriptStore(tmp_path / "transcripts.sqlite3").load("a", 9, 10) == messages[9:]
+
+
+def test_append_is_idempotent_per_position(tmp_path):
+    store = TranscriptStore(tmp_path / "transcripts.sqlite3")
+    store.append("a", 0, [{"role": "user", "content": "draft"}])
+    store.append("a", 0, [{"role": "user", "content": "final"}])
+    assert store.load("a", 0, 1) == [{"role": "user", "content": "final"}]